@@ -10,27 +10,54 @@ import json
 import asyncio
 import logging
 import random
+import socket
+import hashlib
 from datetime import datetime
-from claude_integration import predict_game
-from utils import get_round_name, get_team_by_name, get_previous_game_id
+from claude_integration import predict_game, cancel_matchup_research
+from data_fetcher import configure_prefetch, prefetch_team_research, cancel_team_research
+from game_queue import GameQueue, DEFAULT_LEASE_SECONDS, POLL_INTERVAL_SECONDS
+from utils import (get_round_name, get_team_by_name, get_previous_game_id, parse_game_id,
+                   get_feeder_game_ids, get_parent_game_id, get_sibling_game_id)
 
 # Set up logger
 logger = logging.getLogger('bracket_manager')
 
+# Earliest round whose games are predicted speculatively (Elite Eight)
+SPECULATIVE_MIN_ROUND = 4
+
 async def process_bracket(bracket_file_path, output_path, anthropic_client, model_name="claude-3-5-sonnet-20241022", 
-                         test_mode=False, dry_run=False, debug_level=0, use_enhanced_analysis=True):
+                         test_mode=False, dry_run=False, debug_level=0, use_enhanced_analysis=True,
+                         max_concurrent_games=1, scheduler="rounds", http_session=None, game_deadline=None,
+                         prefetch_concurrency=0, speculation_budget=0, queue_path=None, shared_research=False,
+                         research_model=None):
     """
     Process an entire March Madness bracket.
     
     Parameters:
     - bracket_file_path: Path to initial bracket JSON file
     - output_path: Directory to save results and checkpoints
-    - anthropic_client: Initialized Anthropic client
+    - anthropic_client: Initialized AsyncAnthropic client
     - model_name: Claude model to use
     - test_mode: If True, only process first two games
     - dry_run: If True, use mock predictions without making API calls
     - debug_level: Logging verbosity level
     - use_enhanced_analysis: If True, use the multi-query, multi-analysis approach
+    - max_concurrent_games: Maximum number of games to predict concurrently
+    - scheduler: "rounds" to process round by round, or "dag" to start each game as soon as
+      its feeder games have winners
+    - http_session: Shared aiohttp session for searches and page fetches
+    - game_deadline: Wall-clock budget per game in seconds (None for no limit)
+    - prefetch_concurrency: Number of teams whose research may be prefetched in the
+      background at once (0 disables prefetching)
+    - speculation_budget: Maximum number of speculative predictions of candidate matchups
+      in the final rounds (0 disables speculation)
+    - queue_path: If set, act as coordinator: games are submitted to the game queue at this
+      path and predicted by worker processes (see run_worker) instead of locally
+    - shared_research: If True, other brackets in this process share the team research
+      cache, so research still running at the end is left for them (the caller cancels
+      it once every bracket is done)
+    - research_model: Claude model used to summarize research (default: model_name); brackets
+      predicted by different models with the same research model share their research
     
     Returns:
     - Path to completed bracket file
@@ -55,22 +82,137 @@ async def process_bracket(bracket_file_path, output_path, anthropic_client, mode
         json.dump(bracket, f, indent=2)
     logger.debug(f"Initial bracket saved to {initial_bracket_path}")
     
+    # Serializes bracket updates and checkpoint writes between concurrent games
+    checkpoint_lock = asyncio.Lock()
+    
+    # Options passed through to predict_game for every game
+    prediction_options = {
+        "use_enhanced_analysis": use_enhanced_analysis,
+        "http_session": http_session,
+        "game_deadline": game_deadline,
+        "research_model": research_model
+    }
+    research_model = research_model or model_name
+    
+    # As coordinator, every ready game is handed to the queue at once and workers do the research
+    game_queue = None
+    if queue_path:
+        game_queue = GameQueue(queue_path)
+        # A checkpoint records the last completed game; only a resumed bracket keeps queued results
+        resume = bracket.get("last_completed_game_id") is not None
+        await asyncio.to_thread(game_queue.start, _bracket_key(bracket), resume)
+        max_concurrent_games = sum(2 ** round_number for round_number in range(len(bracket["rounds"])))
+        prefetch_concurrency = 0
+        speculation_budget = 0
+        logger.info(f"Coordinating bracket through game queue {queue_path}")
+        print(f"Distributing games to workers through {queue_path}")
+    
+    # Speculatively research surviving teams while games are being predicted
+    prefetch_enabled = prefetch_concurrency > 0 and use_enhanced_analysis and not dry_run and not test_mode
+    if prefetch_enabled:
+        configure_prefetch(prefetch_concurrency)
+    
+    def prefetch_alive_teams():
+        if prefetch_enabled:
+            prefetch_team_research(_get_alive_teams(bracket), anthropic_client, research_model, http_session)
+    
+    if game_queue is not None:
+        predict = _make_queue_predictor(game_queue)
+    else:
+        predict = _make_predictor(anthropic_client, model_name, dry_run, prediction_options)
+    
+    # Optionally predict candidate late-round matchups before their feeders finish
+    speculation = None
+    if speculation_budget > 0 and not test_mode:
+        speculation = SpeculativePredictions(bracket, predict, speculation_budget)
+    
+    def on_early_result(game, winner):
+        # The winner is known before the reasoning finishes streaming: prune the loser's
+        # speculative matchups and start on the winner's next opponents right away
+        if winner not in (game["team1"]["name"], game["team2"]["name"]):
+            return  # Names are reconciled when the full prediction is recorded
+        if speculation is not None:
+            speculation.on_game_finished(game, winner)
+        if prefetch_enabled:
+            loser = game["team2"]["name"] if winner == game["team1"]["name"] else game["team1"]["name"]
+            alive_teams = [team for team in _get_alive_teams(bracket) if team not in (winner, loser)]
+            prefetch_team_research([winner] + alive_teams, anthropic_client, research_model, http_session)
+    
+    async def run_game(game):
+        game_predict = lambda g: predict(g, lambda winner, confidence: on_early_result(g, winner))
+        if speculation is not None:
+            speculation.on_game_started(game)
+            speculative_task = speculation.claim(game)
+            if speculative_task is not None:
+                game_predict = lambda _: speculative_task
+        
+        await _predict_and_record(game, bracket, output_path, debug_level, checkpoint_lock, game_predict)
+        
+        if speculation is not None:
+            speculation.on_game_finished(game)
+        prefetch_alive_teams()
+    
+    prefetch_alive_teams()
+    lease_monitor = asyncio.ensure_future(_reissue_expired_leases(game_queue)) if game_queue is not None else None
+    try:
+        if scheduler == "dag":
+            await _process_bracket_dag(bracket, run_game, test_mode, max_concurrent_games)
+        else:
+            await _process_bracket_rounds(bracket, output_path, run_game, test_mode, debug_level, max_concurrent_games)
+    finally:
+        if lease_monitor is not None:
+            lease_monitor.cancel()
+        if speculation is not None:
+            await speculation.cancel_all()
+        if not shared_research:
+            await cancel_team_research()
+            await cancel_matchup_research()
+    
+    # Let workers exit once the bracket is complete
+    if game_queue is not None:
+        await asyncio.to_thread(game_queue.close_queue)
+    
+    # Save final bracket
+    final_path = os.path.join(output_path, f"final_bracket_{timestamp}.json")
+    with open(final_path, 'w') as f:
+        json.dump(bracket, f, indent=2)
+    
+    # Also save as standard final_bracket.json
+    standard_final_path = os.path.join(output_path, "final_bracket.json")
+    with open(standard_final_path, 'w') as f:
+        json.dump(bracket, f, indent=2)
+    
+    logger.info(f"Final bracket saved to {final_path}")
+    return standard_final_path
+
+async def _process_bracket_rounds(bracket, output_path, run_game, test_mode, debug_level, max_concurrent_games):
+    """
+    Process the bracket round by round, generating each round once the previous one is complete.
+    
+    Parameters:
+    - bracket: Full bracket data (updated in place)
+    - output_path: Directory to save round checkpoints
+    - run_game: Coroutine function that predicts and records a single game
+    - test_mode: If True, only process first two games
+    - debug_level: Logging verbosity level
+    - max_concurrent_games: Maximum number of games in a round to predict concurrently
+    """
     # Process each round
     for round_idx, round_data in enumerate(bracket["rounds"]):
         # Skip if this round doesn't have games yet
         if not round_data["games"]:
             logger.debug(f"Skipping {round_data['round_name']} (no games)")
             continue
-            
+        
         round_number = round_data["round_number"]
         round_name = round_data["round_name"]
         
         logger.info(f"Processing {round_name} ({len(round_data['games'])} games)")
         print(f"\nProcessing {round_name} ({len(round_data['games'])} games)")
         
-        # Process each game in the round
-        game_count = 0
-        for game_idx, game in enumerate(round_data["games"]):
+        # Collect the games in this round that still need a prediction
+        pending_games = []
+        for game in round_data["games"]:
             game_id = game["game_id"]
             
             # Skip already predicted games (for resuming)
@@ -78,81 +220,36 @@ async def process_bracket(bracket_file_path, output_path, anthropic_client, mode
                 logger.info(f"Skipping game {game_id} (already predicted)")
                 print(f"Skipping game {game_id} (already predicted)")
                 continue
-                
-            # Check if we should start from this game (resuming)
-            if bracket["last_completed_game_id"] is not None:
-                prev_game_id = get_previous_game_id(game_id, bracket)
-                if prev_game_id and bracket["last_completed_game_id"] != prev_game_id:
-                    logger.debug(f"Skipping game {game_id} (resuming from later game)")
-                    continue
-            
-            team1 = game["team1"]["name"]
-            team2 = game["team2"]["name"]
-            
-            logger.info(f"Predicting game {game_id}: {team1} vs {team2}")
-            print(f"\nPredicting game {game_id}: {team1} (Seed #{game['team1']['seed']}) vs {team2} (Seed #{game['team2']['seed']})")
             
             # In test mode, only process first two games
-            game_count += 1
-            if test_mode and game_count > 2:
+            if test_mode and len(pending_games) >= 2:
                 logger.info("Test mode: stopping after two games")
                 break
             
-            # Get prediction for this game
-            try:
-                if dry_run:
-                    # Use mock prediction without API calls
-                    logger.debug("Dry run mode: using mock prediction")
-                    prediction = _generate_mock_prediction(game)
-                    # Simulate API call delay
-                    await asyncio.sleep(1)
-                else:
-                    # Get real prediction using either enhanced or standard analysis
-                    prediction = await predict_game(
-                        game, 
-                        anthropic_client, 
-                        model_name,
-                        use_enhanced_analysis=use_enhanced_analysis
-                    )
-                
-                # Debug the prediction
-                logger.debug(f"Prediction for {game_id}: {prediction}")
-                
-                # Update game with prediction
-                game["predicted_winner"] = prediction["predicted_winner"]
-                game["confidence"] = prediction["confidence"]
-                game["reasoning"] = prediction["reasoning"]
-                game["sources"] = prediction["sources"]
-                
-                # Update last_completed_game_id
-                bracket["last_completed_game_id"] = game_id
-                
-                # Save checkpoint after each game
-                checkpoint_path = os.path.join(output_path, f"bracket_checkpoint_{game_id}.json")
-                with open(checkpoint_path, 'w') as f:
-                    json.dump(bracket, f, indent=2)
-                
-                logger.info(f"Predicted winner: {prediction['predicted_winner']} (Confidence: {prediction['confidence']}%)")
-                print(f"Predicted winner: {prediction['predicted_winner']} (Confidence: {prediction['confidence']}%)")
-                print(f"Reasoning: {prediction['reasoning']}")
-                
-            except Exception as e:
-                logger.error(f"Error predicting game {game_id}: {str(e)}", exc_info=True)
-                print(f"Error predicting game {game_id}: {str(e)}")
-                
-                # Create a checkpoint with error info
-                error_checkpoint_path = os.path.join(output_path, f"error_checkpoint_{game_id}.json")
-                bracket["error"] = {
-                    "game_id": game_id,
-                    "error_message": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }
-                with open(error_checkpoint_path, 'w') as f:
-                    json.dump(bracket, f, indent=2)
+            pending_games.append(game)
+        
+        if max_concurrent_games > 1:
+            # Run games in this round concurrently with a bounded worker pool
+            logger.info(f"Running {len(pending_games)} games with up to {max_concurrent_games} concurrent predictions")
+            semaphore = asyncio.Semaphore(max_concurrent_games)
+            
+            async def run_bounded(game):
+                async with semaphore:
+                    await run_game(game)
+            
+            await asyncio.gather(*(run_bounded(game) for game in pending_games))
+        else:
+            # Process each game in the round one after another
+            for game in pending_games:
+                # Check if we should start from this game (resuming). Concurrent runs complete
+                # games out of order, so last_completed_game_id is only meaningful here.
+                if bracket["last_completed_game_id"] is not None:
+                    prev_game_id = get_previous_game_id(game["game_id"], bracket)
+                    if prev_game_id and bracket["last_completed_game_id"] != prev_game_id:
+                        logger.debug(f"Skipping game {game['game_id']} (resuming from later game)")
+                        continue
                 
-                # Re-raise if in debug mode, otherwise continue
-                if debug_level > 1:
-                    raise
+                await run_game(game)
         
         # After completing this round, generate next round matchups
         if round_number < len(bracket["rounds"]):
@@ -175,8 +272,7 @@ async def process_bracket(bracket_file_path, output_path, anthropic_client, mode
                     
                     # Save checkpoint after generating next round
                     checkpoint_path = os.path.join(output_path, f"bracket_checkpoint_round_{round_number}.json")
-                    with open(checkpoint_path, 'w') as f:
-                        json.dump(bracket, f, indent=2)
+                    _save_bracket(bracket, checkpoint_path)
                     
                     logger.info(f"Generated {len(next_round['games'])} games for {next_round['round_name']}")
                     
@@ -184,7 +280,7 @@ async def process_bracket(bracket_file_path, output_path, anthropic_client, mode
                     if test_mode:
                         logger.info("Test mode: stopping after first round")
                         break
-                        
+                
                 except Exception as e:
                     logger.error(f"Error generating next round: {str(e)}", exc_info=True)
                     print(f"Error generating next round: {str(e)}")
@@ -196,19 +292,480 @@ async def process_bracket(bracket_file_path, output_path, anthropic_client, mode
                 logger.warning(f"Not all games in {round_name} have predictions. Skipping next round generation.")
                 print(f"Warning: Not all games in {round_name} have predictions. Skipping next round generation.")
                 break
+
+async def _process_bracket_dag(bracket, run_game, test_mode, max_concurrent_games):
+    """
+    Process the bracket as a dependency graph instead of round by round.
     
-    # Save final bracket
-    final_path = os.path.join(output_path, f"final_bracket_{timestamp}.json")
-    with open(final_path, 'w') as f:
-        json.dump(bracket, f, indent=2)
+    Each later-round game is created as soon as both of its feeder games have a predicted
+    winner and starts as soon as a worker slot is free. Ready games are prioritized by the
+    length of their remaining path to the championship (earlier rounds first), then by
+    whether their sibling game is already done or running, so parent games unblock early.
     
-    # Also save as standard final_bracket.json
-    standard_final_path = os.path.join(output_path, "final_bracket.json")
-    with open(standard_final_path, 'w') as f:
-        json.dump(bracket, f, indent=2)
+    Parameters:
+    - bracket: Full bracket data (updated in place)
+    - run_game: Coroutine function that predicts and records a single game
+    - test_mode: If True, only process first two games
+    - max_concurrent_games: Maximum number of games to predict concurrently
+    """
+    num_rounds = len(bracket["rounds"])
+    games_by_id = {game["game_id"]: game for round_data in bracket["rounds"] for game in round_data["games"]}
+    started = set()
+    ready = []
+    running = {}
+    launched = 0
     
-    logger.info(f"Final bracket saved to {final_path}")
-    return standard_final_path
+    def create_game_if_ready(game_id):
+        """Create a later-round game once both of its feeder games have winners."""
+        if game_id is None or game_id in games_by_id:
+            return
+        feeders = [games_by_id.get(feeder_id) for feeder_id in get_feeder_game_ids(game_id)]
+        if not all(feeder and feeder.get("predicted_winner") for feeder in feeders):
+            return
+        
+        round_number, game_number = parse_game_id(game_id)
+        new_game = create_next_round_game(feeders[0], feeders[1], round_number, game_number)
+        
+        # Keep each round's game list in bracket order even though games finish out of order
+        round_games = bracket["rounds"][round_number - 1]["games"]
+        round_games.append(new_game)
+        round_games.sort(key=lambda game: parse_game_id(game["game_id"])[1])
+        bracket["current_round"] = max(bracket.get("current_round") or 1, round_number)
+        
+        games_by_id[game_id] = new_game
+        ready.append(new_game)
+        logger.info(f"Scheduled game {game_id}: {new_game['team1']['name']} vs {new_game['team2']['name']}")
+    
+    def priority(game):
+        round_number, game_number = parse_game_id(game["game_id"])
+        sibling_id = get_sibling_game_id(game["game_id"])
+        sibling = games_by_id.get(sibling_id)
+        sibling_progressing = sibling_id in started or (sibling is not None and sibling.get("predicted_winner") is not None)
+        return (round_number, 0 if sibling_progressing else 1, game_number)
+    
+    # Seed the ready list with existing unpredicted games (supports resuming)
+    for round_data in bracket["rounds"]:
+        for game in round_data["games"]:
+            if game.get("predicted_winner") is None:
+                ready.append(game)
+            else:
+                logger.info(f"Skipping game {game['game_id']} (already predicted)")
+    
+    # Create any later-round games whose feeders were already predicted
+    if not test_mode:
+        for round_number in range(2, num_rounds + 1):
+            for game_number in range(1, 2 ** (num_rounds - round_number) + 1):
+                create_game_if_ready(f"R{round_number}G{game_number}")
+    
+    logger.info(f"DAG scheduler starting with {len(ready)} ready games, up to {max_concurrent_games} concurrent")
+    print(f"\nScheduling games by bracket dependencies ({len(ready)} ready)")
+    
+    while ready or running:
+        # Fill free worker slots with the highest-priority ready games
+        while ready and len(running) < max_concurrent_games:
+            if test_mode and launched >= 2:
+                logger.info("Test mode: stopping after two games")
+                ready.clear()
+                break
+            game = min(ready, key=priority)
+            ready.remove(game)
+            started.add(game["game_id"])
+            running[asyncio.create_task(run_game(game))] = game
+            launched += 1
+        
+        if not running:
+            break
+        
+        done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            game = running.pop(task)
+            try:
+                task.result()
+            except Exception:
+                # Errors only propagate here in debug mode; cancel the remaining games first
+                for other in running:
+                    other.cancel()
+                raise
+            
+            if game.get("predicted_winner") is None:
+                logger.warning(f"Game {game['game_id']} has no prediction; its later-round game cannot be scheduled")
+                continue
+            
+            if not test_mode:
+                create_game_if_ready(get_parent_game_id(game["game_id"], num_rounds))
+    
+    unfinished = [game_id for game_id, game in games_by_id.items() if game.get("predicted_winner") is None]
+    if unfinished:
+        logger.warning(f"DAG scheduler finished with {len(unfinished)} unpredicted games: {', '.join(unfinished)}")
+        print(f"Warning: {len(unfinished)} games could not be predicted")
+
+def _make_predictor(anthropic_client, model_name, dry_run, prediction_options):
+    """
+    Build the coroutine function that predicts a single game in this process.
+    
+    Parameters:
+    - anthropic_client: Initialized AsyncAnthropic client
+    - model_name: Claude model to use
+    - dry_run: If True, use mock predictions without making API calls
+    - prediction_options: Keyword arguments passed through to predict_game
+    
+    Returns:
+    - Coroutine function predict(game, on_early_result=None) returning a prediction
+    """
+    async def predict(game, on_early_result=None):
+        if dry_run:
+            # Use mock prediction without API calls
+            logger.debug("Dry run mode: using mock prediction")
+            prediction = _generate_mock_prediction(game)
+            # Simulate API call delay
+            await asyncio.sleep(1)
+            return prediction
+        
+        # Get real prediction using either enhanced or standard analysis
+        return await predict_game(
+            game, 
+            anthropic_client, 
+            model_name,
+            on_early_result=on_early_result,
+            **prediction_options
+        )
+    
+    return predict
+
+def _make_queue_predictor(game_queue):
+    """
+    Build a predict function that submits games to the game queue and waits for a worker.
+    
+    Parameters:
+    - game_queue: GameQueue shared with the workers
+    
+    Returns:
+    - Coroutine function predict(game, on_early_result=None) returning a prediction
+    """
+    async def predict(game, on_early_result=None):
+        await asyncio.to_thread(game_queue.submit, game)
+        while True:
+            prediction = await asyncio.to_thread(game_queue.get_result, game["game_id"])
+            if prediction is not None:
+                return prediction
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+    
+    return predict
+
+async def _reissue_expired_leases(game_queue):
+    """Coordinator loop returning games whose worker stopped sending heartbeats to the queue."""
+    while True:
+        for game_id, worker_id in await asyncio.to_thread(game_queue.requeue_expired):
+            logger.warning(f"Lease on {game_id} held by {worker_id} expired; re-issuing the game")
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+def _bracket_key(bracket):
+    """Identify a bracket by its tournament name and first-round matchups."""
+    first_round = [(game["team1"]["name"], game["team2"]["name"]) for game in bracket["rounds"][0]["games"]]
+    key_data = json.dumps([bracket.get("tournament_name"), first_round])
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+async def run_worker(queue_path, anthropic_client, model_name="claude-3-5-sonnet-20241022", dry_run=False,
+                     use_enhanced_analysis=True, max_concurrent_games=1, http_session=None, game_deadline=None,
+                     lease_seconds=DEFAULT_LEASE_SECONDS, worker_id=None):
+    """
+    Predict games claimed from a coordinator's game queue until the coordinator closes it.
+    
+    Each claimed game is leased to this worker; the lease is renewed while the prediction
+    runs, so a crashed worker's games are re-issued once their lease expires.
+    
+    Parameters:
+    - queue_path: Path to the game queue shared with the coordinator
+    - anthropic_client: Initialized AsyncAnthropic client
+    - model_name: Claude model to use
+    - dry_run: If True, use mock predictions without making API calls
+    - use_enhanced_analysis: If True, use the multi-query, multi-analysis approach
+    - max_concurrent_games: Number of games this worker predicts at once
+    - http_session: Shared aiohttp session for searches and page fetches
+    - game_deadline: Wall-clock budget per game in seconds (None for no limit)
+    - lease_seconds: How long a claimed game stays leased without a heartbeat
+    - worker_id: Name of this worker in the queue (default: host name and process id)
+    
+    Returns:
+    - Number of games this worker completed
+    """
+    game_queue = GameQueue(queue_path)
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    prediction_options = {
+        "use_enhanced_analysis": use_enhanced_analysis,
+        "http_session": http_session,
+        "game_deadline": game_deadline
+    }
+    predict = _make_predictor(anthropic_client, model_name, dry_run, prediction_options)
+    completed = 0
+    
+    logger.info(f"Worker {worker_id} polling game queue {queue_path}")
+    print(f"Worker {worker_id} waiting for games from {queue_path}")
+    
+    async def keep_lease(game_id):
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            if not await asyncio.to_thread(game_queue.heartbeat, game_id, worker_id, lease_seconds):
+                logger.warning(f"Lost the lease on {game_id}; another worker may also be predicting it")
+                return
+    
+    async def work():
+        nonlocal completed
+        while True:
+            game = await asyncio.to_thread(game_queue.claim, worker_id, lease_seconds)
+            if game is None:
+                if await asyncio.to_thread(game_queue.is_closed):
+                    return
+                await asyncio.sleep(POLL_INTERVAL_SECONDS)
+                continue
+            
+            game_id = game["game_id"]
+            logger.info(f"Claimed game {game_id}: {game['team1']['name']} vs {game['team2']['name']}")
+            print(f"\nPredicting game {game_id}: {game['team1']['name']} (Seed #{game['team1']['seed']}) "
+                  f"vs {game['team2']['name']} (Seed #{game['team2']['seed']})")
+            
+            heartbeat = asyncio.ensure_future(keep_lease(game_id))
+            try:
+                prediction = await predict(game)
+            except Exception as e:
+                logger.error(f"Error predicting game {game_id}: {str(e)}", exc_info=True)
+                await asyncio.to_thread(game_queue.fail, game_id, worker_id, e)
+                continue
+            finally:
+                heartbeat.cancel()
+            
+            if await asyncio.to_thread(game_queue.complete, game_id, worker_id, prediction):
+                completed += 1
+                print(f"Predicted winner for {game_id}: {prediction['predicted_winner']} "
+                      f"(Confidence: {prediction['confidence']}%)")
+            else:
+                logger.info(f"Game {game_id} was already completed by another worker")
+    
+    await asyncio.gather(*(work() for _ in range(max(1, max_concurrent_games))))
+    logger.info(f"Game queue closed; worker {worker_id} completed {completed} games")
+    return completed
+
+class SpeculativePredictions:
+    """
+    Speculative prediction of candidate matchups for games in the final rounds.
+    
+    Once both feeder games of a late-round game exist, there are at most four possible
+    pairings for it. Each pairing is predicted in the background while the feeders are
+    still being decided. When a feeder finishes, pairings with its loser are cancelled,
+    and when the real game starts it claims the prediction for the actual pairing.
+    
+    Parameters:
+    - bracket: Full bracket data
+    - predict: Coroutine function returning the prediction for a game
+    - budget: Maximum number of speculative predictions to start for the whole run
+    """
+    
+    def __init__(self, bracket, predict, budget):
+        self.bracket = bracket
+        self.predict = predict
+        self.budget = budget
+        self.started = 0
+        self.num_rounds = len(bracket["rounds"])
+        self.tasks = {}  # (game_id, team1 name, team2 name) -> asyncio.Task
+    
+    def _find_game(self, game_id):
+        round_number, _ = parse_game_id(game_id)
+        if round_number is None or round_number > self.num_rounds:
+            return None
+        for game in self.bracket["rounds"][round_number - 1]["games"]:
+            if game["game_id"] == game_id:
+                return game
+        return None
+    
+    def on_game_started(self, game):
+        """Start predicting candidate pairings for the game this one feeds into."""
+        parent_id = get_parent_game_id(game["game_id"], self.num_rounds)
+        if parent_id is None or parse_game_id(parent_id)[0] < SPECULATIVE_MIN_ROUND:
+            return
+        if self._find_game(parent_id) is not None:
+            return
+        
+        feeders = [self._find_game(feeder_id) for feeder_id in get_feeder_game_ids(parent_id)]
+        if not all(feeders):
+            return
+        
+        # Candidate winners of each feeder: its predicted winner if decided, otherwise both teams
+        candidates = []
+        for feeder in feeders:
+            if feeder.get("predicted_winner"):
+                candidates.append([feeder["predicted_winner"]])
+            else:
+                candidates.append([feeder["team1"]["name"], feeder["team2"]["name"]])
+        
+        parent_round, parent_number = parse_game_id(parent_id)
+        pairings = []
+        for winner1 in candidates[0]:
+            for winner2 in candidates[1]:
+                hypothetical = create_next_round_game(
+                    dict(feeders[0], predicted_winner=winner1),
+                    dict(feeders[1], predicted_winner=winner2),
+                    parent_round, parent_number
+                )
+                pairings.append(hypothetical)
+        
+        # Most likely pairings (best seeds) first, in case the budget runs out
+        pairings.sort(key=lambda g: g["team1"]["seed"] + g["team2"]["seed"])
+        for hypothetical in pairings:
+            key = (parent_id, hypothetical["team1"]["name"], hypothetical["team2"]["name"])
+            if key in self.tasks:
+                continue
+            if self.started >= self.budget:
+                logger.debug(f"Speculation budget exhausted; not predicting {key}")
+                return
+            self.started += 1
+            self.tasks[key] = asyncio.ensure_future(self.predict(hypothetical))
+            logger.info(f"Speculatively predicting {parent_id}: {key[1]} vs {key[2]} "
+                        f"({self.started}/{self.budget} of speculation budget)")
+    
+    def on_game_finished(self, game, winner=None):
+        """Cancel pairings of the next game that include this game's loser."""
+        winner = winner or game.get("predicted_winner")
+        if not winner:
+            return
+        loser = game["team2"]["name"] if winner == game["team1"]["name"] else game["team1"]["name"]
+        parent_id = get_parent_game_id(game["game_id"], self.num_rounds)
+        for key in list(self.tasks):
+            if key[0] == parent_id and loser in key[1:]:
+                self.tasks.pop(key).cancel()
+                logger.debug(f"Cancelled speculative prediction {key} ({loser} eliminated)")
+    
+    def claim(self, game):
+        """
+        Take the speculative prediction for this game's actual pairing, if one was started.
+        
+        Returns:
+        - asyncio.Task resolving to the prediction, or None
+        """
+        key = (game["game_id"], game["team1"]["name"], game["team2"]["name"])
+        task = self.tasks.pop(key, None)
+        
+        # Any other pairings for this game are now moot
+        for other_key in [k for k in self.tasks if k[0] == game["game_id"]]:
+            self.tasks.pop(other_key).cancel()
+        
+        if task is not None:
+            status = "ready" if task.done() else "in progress"
+            logger.info(f"Using speculative prediction for {game['game_id']} ({status})")
+        return task
+    
+    async def cancel_all(self):
+        """Cancel all speculative predictions that were never claimed."""
+        pending = list(self.tasks.values())
+        self.tasks.clear()
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        logger.info(f"Speculation used {self.started} of {self.budget} speculative predictions")
+
+def _get_alive_teams(bracket):
+    """
+    List the teams still alive in the bracket, in prefetch priority order.
+    
+    Winners waiting for their next game come first, since that game is the next to need
+    their research. Teams in unpredicted games follow in reverse bracket order, because
+    games later in the bracket are the furthest from starting.
+    
+    Parameters:
+    - bracket: Full bracket data
+    
+    Returns:
+    - List of team names
+    """
+    num_rounds = len(bracket["rounds"])
+    game_ids = {game["game_id"] for round_data in bracket["rounds"] for game in round_data["games"]}
+    waiting_winners = []
+    pending_teams = []
+    
+    for round_data in bracket["rounds"]:
+        for game in round_data["games"]:
+            if game.get("predicted_winner") is None:
+                pending_teams.extend([game["team1"]["name"], game["team2"]["name"]])
+            else:
+                parent_id = get_parent_game_id(game["game_id"], num_rounds)
+                if parent_id and parent_id not in game_ids:
+                    waiting_winners.append(game["predicted_winner"])
+    
+    return waiting_winners + pending_teams[::-1]
+
+async def _predict_and_record(game, bracket, output_path, debug_level, checkpoint_lock, predict):
+    """
+    Predict a single game, record the result into the bracket and save a checkpoint.
+    
+    Parameters:
+    - game: Game dictionary to predict (updated in place)
+    - bracket: Full bracket data
+    - output_path: Directory to save checkpoints
+    - debug_level: Logging verbosity level (errors are re-raised above 1)
+    - checkpoint_lock: asyncio.Lock serializing bracket updates and checkpoint writes
+    - predict: Coroutine function returning the prediction for a game
+    """
+    game_id = game["game_id"]
+    team1 = game["team1"]["name"]
+    team2 = game["team2"]["name"]
+    
+    logger.info(f"Predicting game {game_id}: {team1} vs {team2}")
+    print(f"\nPredicting game {game_id}: {team1} (Seed #{game['team1']['seed']}) vs {team2} (Seed #{game['team2']['seed']})")
+    
+    # Get prediction for this game
+    try:
+        prediction = await predict(game)
+        
+        # Debug the prediction
+        logger.debug(f"Prediction for {game_id}: {prediction}")
+        
+        async with checkpoint_lock:
+            # Update game with prediction
+            game["predicted_winner"] = prediction["predicted_winner"]
+            game["confidence"] = prediction["confidence"]
+            game["reasoning"] = prediction["reasoning"]
+            game["sources"] = prediction["sources"]
+            
+            # Update last_completed_game_id
+            bracket["last_completed_game_id"] = game_id
+            
+            # Save checkpoint after each game
+            checkpoint_path = os.path.join(output_path, f"bracket_checkpoint_{game_id}.json")
+            _save_bracket(bracket, checkpoint_path)
+        
+        logger.info(f"Predicted winner: {prediction['predicted_winner']} (Confidence: {prediction['confidence']}%)")
+        print(f"Predicted winner for {game_id}: {prediction['predicted_winner']} (Confidence: {prediction['confidence']}%)")
+        print(f"Reasoning: {prediction['reasoning']}")
+    
+    except Exception as e:
+        logger.error(f"Error predicting game {game_id}: {str(e)}", exc_info=True)
+        print(f"Error predicting game {game_id}: {str(e)}")
+        
+        # Create a checkpoint with error info
+        async with checkpoint_lock:
+            error_checkpoint_path = os.path.join(output_path, f"error_checkpoint_{game_id}.json")
+            bracket["error"] = {
+                "game_id": game_id,
+                "error_message": str(e),
+                "timestamp": datetime.now().isoformat()
+            }
+            _save_bracket(bracket, error_checkpoint_path)
+        
+        # Re-raise if in debug mode, otherwise continue
+        if debug_level > 1:
+            raise
+
+def _save_bracket(bracket, path):
+    """
+    Atomically write the bracket to a JSON file.
+    
+    The bracket is written to a temporary file first and then moved into place, so a
+    checkpoint is never left half-written if the process dies mid-write.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(bracket, f, indent=2)
+    os.replace(tmp_path, path)
 
 def _generate_mock_prediction(game):
     """Generate a mock prediction for testing without API calls."""
@@ -271,7 +828,7 @@ def generate_next_round_games(current_round_games, next_round_number):
         if i + 1 >= len(current_round_games):
             logger.warning(f"Odd number of games in round: {len(current_round_games)}")
             break
-            
+        
         game1 = current_round_games[i]
         game2 = current_round_games[i + 1]
         
@@ -280,37 +837,53 @@ def generate_next_round_games(current_round_games, next_round_number):
             logger.error(f"Missing prediction for game {game1.get('game_id')} or {game2.get('game_id')}")
             raise ValueError(f"Cannot generate next round: missing prediction for one or more games")
         
-        # Get winners
-        winner1 = get_team_by_name(game1, game1["predicted_winner"])
-        winner2 = get_team_by_name(game2, game2["predicted_winner"])
-        
-        # Determine region for the new game
-        if next_round_number == 5:
-            # For the Final Four, the regions are combined
-            if game1["region"] in ["South", "East"]:
-                region = "South/East"
-            else:
-                region = "West/Midwest"
-        elif next_round_number == 6:
-            # Championship game has no region
-            region = "Championship"
-        else:
-            # Regular rounds keep the same region
-            region = game1["region"]
-        
-        # Create new game
-        new_game = {
-            "game_id": f"R{next_round_number}G{len(next_round_games) + 1}",
-            "region": region,
-            "team1": winner1,
-            "team2": winner2,
-            "predicted_winner": None,
-            "confidence": None,
-            "reasoning": None,
-            "sources": []
-        }
+        new_game = create_next_round_game(game1, game2, next_round_number, len(next_round_games) + 1)
         
-        logger.debug(f"Created new game {new_game['game_id']}: {winner1['name']} vs {winner2['name']}")
         next_round_games.append(new_game)
     
-    return next_round_games
\ No newline at end of file
+    return next_round_games
+
+def create_next_round_game(game1, game2, next_round_number, game_number):
+    """
+    Create a single next-round game from the winners of two feeder games.
+    
+    Parameters:
+    - game1, game2: Feeder games with predictions (in bracket order)
+    - next_round_number: Number of the next round
+    - game_number: Position of the new game within its round (1-based)
+    
+    Returns:
+    - New game dictionary
+    """
+    # Get winners
+    winner1 = get_team_by_name(game1, game1["predicted_winner"])
+    winner2 = get_team_by_name(game2, game2["predicted_winner"])
+    
+    # Determine region for the new game
+    if next_round_number == 5:
+        # For the Final Four, the regions are combined
+        if game1["region"] in ["South", "East"]:
+            region = "South/East"
+        else:
+            region = "West/Midwest"
+    elif next_round_number == 6:
+        # Championship game has no region
+        region = "Championship"
+    else:
+        # Regular rounds keep the same region
+        region = game1["region"]
+    
+    # Create new game
+    new_game = {
+        "game_id": f"R{next_round_number}G{game_number}",
+        "region": region,
+        "team1": winner1,
+        "team2": winner2,
+        "predicted_winner": None,
+        "confidence": None,
+        "reasoning": None,
+        "sources": []
+    }
+    
+    logger.debug(f"Created new game {new_game['game_id']}: {winner1['name']} vs {winner2['name']}")
+    return new_game
\ No newline at end of file
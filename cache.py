@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Cache Module
+-----------
+Persistent on-disk caches shared across runs.
+
+Each cache is a SQLite file in the cache directory holding JSON values with a
+time-to-live. Reads refresh an entry's last-access time, and when a cache grows
+past its size cap the least recently used entries are evicted. Hit and miss counts
+are logged at the end of the run.
+
+The caches hold the outputs of the research pipeline's stages (search -> page text ->
+source summaries -> matchup research -> predictions). Each stage's key is built from
+its own inputs, so a rerun after a change recomputes only the stages downstream of it.
+Source summaries are keyed by the text they summarize and predictions by the research
+they were made from. Matchup research is keyed by the matchup and settings rather than
+by the search results it was built from, so it expires together with them.
+"""
+
+import os
+import time
+import json
+import sqlite3
+import zlib
+import hashlib
+import logging
+from contextlib import contextmanager
+
+# Set up logger
+logger = logging.getLogger('cache')
+
+# Default cache settings (override with configure_caches)
+DEFAULT_CACHE_DIR = ".cache"
+DEFAULT_SEARCH_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_SEARCH_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_PAGE_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_PAGE_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_SUMMARY_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_RESEARCH_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_NEGATIVE_TTL_SECONDS = 24 * 60 * 60
+DOMAIN_STATS_TTL_SECONDS = 30 * 24 * 60 * 60
+SOURCE_STATS_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_PREDICTION_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_PREDICTION_MAX_BYTES = 20 * 1024 * 1024
+
+# Eviction removes entries until the cache is below this share of its cap, so it doesn't run on every write
+EVICTION_TARGET_RATIO = 0.9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+"""
+
+# Global registry of run-scoped caches by name
+_caches = {}
+
+class DiskCache:
+    """
+    SQLite-backed cache of JSON values with a TTL and an LRU size cap.
+    
+    Parameters:
+    - name: Cache name used in logs
+    - path: Path to the SQLite file (created if missing)
+    - ttl_seconds: How long an entry stays valid (None to never expire)
+    - max_bytes: Size cap for stored values; least recently used entries are evicted beyond it
+    - compress: If True, values are stored zlib-compressed
+    - refresh: If True, lookups always miss, so every value is recomputed and overwritten
+    """
+    
+    def __init__(self, name, path, ttl_seconds=None, max_bytes=None, compress=False, refresh=False):
+        self.name = name
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.refresh = refresh
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+    
+    @contextmanager
+    def _connect(self):
+        # A connection per operation keeps the cache safe to use from worker threads
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def get(self, key):
+        """
+        Look up a value.
+        
+        Returns:
+        - The cached value, or None if missing or expired
+        """
+        if self.refresh:
+            self.stats["misses"] += 1
+            return None
+        
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            if self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.stats["misses"] += 1
+                self.stats["expired"] += 1
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        self.stats["hits"] += 1
+        data = zlib.decompress(row[0]).decode("utf-8") if self.compress else row[0]
+        return json.loads(data)
+    
+    def set(self, key, value):
+        """Store a value, evicting least recently used entries if the cache is over its cap."""
+        data = json.dumps(value)
+        if self.compress:
+            data = zlib.compress(data.encode("utf-8"))
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now)
+            )
+            self.stats["writes"] += 1
+            if self.max_bytes is not None:
+                self._evict(conn)
+    
+    def clear(self):
+        """
+        Remove every entry.
+        
+        Returns:
+        - Number of entries removed
+        """
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM entries").rowcount
+    
+    def count(self, event):
+        """Count a cache-specific event (e.g. a revalidation) for the end-of-run stats."""
+        self.stats[event] = self.stats.get(event, 0) + 1
+    
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        target = self.max_bytes * EVICTION_TARGET_RATIO
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self.stats["evictions"] += evicted
+        logger.debug(f"{self.name} cache: evicted {evicted} least recently used entries")
+
+def make_cache_key(*parts):
+    """
+    Build a cache key from JSON-serializable parts.
+    
+    Returns:
+    - Hex digest identifying the parts
+    """
+    data = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+def configure_caches(cache_dir=DEFAULT_CACHE_DIR, search_ttl_seconds=DEFAULT_SEARCH_TTL_SECONDS,
+                     search_max_bytes=DEFAULT_SEARCH_MAX_BYTES, page_ttl_seconds=DEFAULT_PAGE_TTL_SECONDS,
+                     page_max_bytes=DEFAULT_PAGE_MAX_BYTES, summary_max_bytes=DEFAULT_SUMMARY_MAX_BYTES,
+                     prediction_ttl_seconds=DEFAULT_PREDICTION_TTL_SECONDS,
+                     prediction_max_bytes=DEFAULT_PREDICTION_MAX_BYTES, refresh_predictions=False,
+                     clear_predictions=False, negative_ttl_seconds=DEFAULT_NEGATIVE_TTL_SECONDS):
+    """
+    Open the persistent caches for this run.
+    
+    Parameters:
+    - cache_dir: Directory holding the cache files (None disables caching)
+    - search_ttl_seconds: How long Exa search results stay valid
+    - search_max_bytes: Size cap for the search cache
+    - page_ttl_seconds: How long extracted page text is kept (stale pages are revalidated)
+    - page_max_bytes: Size cap for the page cache (compressed)
+    - summary_max_bytes: Size cap for the source summary cache (summaries are keyed by
+      content, so they never expire)
+    - prediction_ttl_seconds: How long cached game predictions are reused
+    - prediction_max_bytes: Size cap for the prediction cache
+    - refresh_predictions: If True, ignore cached predictions and overwrite them with new ones
+    - clear_predictions: If True, remove all cached predictions before the run
+    - negative_ttl_seconds: How long a URL that failed to yield text is skipped
+    """
+    _caches.clear()
+    if not cache_dir:
+        logger.info("Persistent caches disabled")
+        return
+    
+    os.makedirs(cache_dir, exist_ok=True)
+    _caches["search"] = DiskCache("Search", os.path.join(cache_dir, "search_cache.sqlite"),
+                                  ttl_seconds=search_ttl_seconds, max_bytes=search_max_bytes)
+    _caches["pages"] = DiskCache("Page", os.path.join(cache_dir, "page_cache.sqlite"),
+                                 ttl_seconds=page_ttl_seconds, max_bytes=page_max_bytes, compress=True)
+    _caches["summaries"] = DiskCache("Summary", os.path.join(cache_dir, "summary_cache.sqlite"),
+                                     max_bytes=summary_max_bytes)
+    # Matchup research is built from search results, so it expires with them
+    _caches["research"] = DiskCache("Research", os.path.join(cache_dir, "research_cache.sqlite"),
+                                    ttl_seconds=search_ttl_seconds, max_bytes=DEFAULT_RESEARCH_MAX_BYTES,
+                                    compress=True)
+    _caches["predictions"] = DiskCache("Prediction", os.path.join(cache_dir, "prediction_cache.sqlite"),
+                                       ttl_seconds=prediction_ttl_seconds, max_bytes=prediction_max_bytes,
+                                       refresh=refresh_predictions)
+    # Source ranking: per-domain fetch stats, and URLs that failed to yield text
+    _caches["domains"] = DiskCache("Domain stats", os.path.join(cache_dir, "domain_stats.sqlite"),
+                                   ttl_seconds=DOMAIN_STATS_TTL_SECONDS, max_bytes=SOURCE_STATS_MAX_BYTES)
+    _caches["failed_urls"] = DiskCache("Failed URL", os.path.join(cache_dir, "failed_urls.sqlite"),
+                                       ttl_seconds=negative_ttl_seconds, max_bytes=SOURCE_STATS_MAX_BYTES)
+    if clear_predictions:
+        removed = _caches["predictions"].clear()
+        logger.info(f"Cleared {removed} cached predictions")
+    logger.info(f"Persistent caches in {cache_dir}")
+
+def configure_stage_journal(path):
+    """
+    Open the run's stage journal.
+    
+    The journal durably records each game's intermediate results (search results, fetched
+    sources and per-query summaries) as they finish, so a run resumed after a crash picks
+    up mid-game instead of redoing the game's research. Unlike the caches it doesn't expire,
+    and it is used even when caching is disabled.
+    
+    Parameters:
+    - path: Path to the journal's SQLite file (None disables the journal)
+    """
+    _caches.pop("journal", None)
+    if path:
+        _caches["journal"] = DiskCache("Stage journal", path, compress=True)
+        logger.info(f"Recording finished stages in {path}")
+
+def get_cache(name):
+    """
+    Get a configured cache by name ("search", "pages", "summaries", "research", "predictions",
+    "domains", "failed_urls" or "journal").
+    
+    Returns:
+    - DiskCache, or None if caching is disabled
+    """
+    return _caches.get(name)
+
+def log_cache_stats():
+    """Log hit and miss counts for each cache."""
+    for cache in _caches.values():
+        stats = cache.stats
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / lookups if lookups else 0
+        extra = "".join(f", {count} {event}" for event, count in stats.items()
+                        if event not in ("hits", "misses", "expired", "writes", "evictions"))
+        logger.info(f"{cache.name} cache: {stats['hits']} hits, {stats['misses']} misses ({hit_rate:.0%} hit rate), "
+                    f"{stats['expired']} expired, {stats['writes']} writes, {stats['evictions']} evicted{extra}")
@@ -6,27 +6,64 @@ Handles communication with Claude API for predictions.
 """
 
 import re
+import time
 import asyncio
+import hashlib
 import logging
-from data_fetcher import search_matchup_multi, fetch_and_analyze_sources
-from utils import get_round_name, estimate_token_count
+from data_fetcher import (search_matchup_multi, fetch_and_analyze_sources, get_team_research, wait_shared,
+                          SUMMARY_PROMPT_VERSION, MAX_CONTENT_LENGTH)
+from utils import get_round_name, estimate_token_count, estimate_messages_token_count, remaining_time
+from rate_limiter import get_governor
+from request_executor import get_executor, CircuitOpenError
 from context import get_upset_factors_by_seed_matchup
+from cache import get_cache, make_cache_key
+from source_dedup import DuplicateFilter
 
 # Set up logger
 logger = logging.getLogger('claude_integration')
 
-async def predict_game(game_data, anthropic_client, model_name="claude-3-7-sonnet-20250219", use_enhanced_analysis=True):
+# Run-scoped research per matchup, keyed by teams, seeds, round, research model and analysis mode
+# (each entry holds the research task, its deadline and the number of predictions waiting for it)
+_matchup_research = {}
+
+# Share of a game's deadline spent on research; the rest is kept for the final prediction
+RESEARCH_DEADLINE_SHARE = 0.75
+
+# Minimum time allowed for the final prediction call, even if research used up the deadline
+MIN_FINAL_PREDICTION_SECONDS = 20
+
+# The final prediction ends with this marker, which is also sent as a stop sequence
+PREDICTION_END_MARKER = "END OF PREDICTION"
+
+# Output cap for the final prediction (the structured block is only a few sentences)
+PREDICTION_MAX_TOKENS = 400
+
+# Version of the research conversation format; bump it when it changes so cached research is rebuilt
+RESEARCH_PROMPT_VERSION = 1
+
+async def predict_game(game_data, anthropic_client, model_name="claude-3-7-sonnet-20250219", use_enhanced_analysis=True,
+                       http_session=None, game_deadline=None, on_early_result=None, research_model=None):
     """
     Process a single game through Claude to get a prediction.
     
     Parameters:
     - game_data: Dictionary with game information
-    - anthropic_client: Initialized Anthropic client
+    - anthropic_client: Initialized AsyncAnthropic client
     - model_name: Claude model to use
     - use_enhanced_analysis: If True, use the multi-query, multi-analysis approach
+    - http_session: Shared aiohttp session for searches and page fetches
+    - game_deadline: Wall-clock budget for this game in seconds (None for no limit). Research
+      still outstanding when its share of the budget runs out is cancelled, and the prediction
+      uses whatever summaries have arrived
+    - on_early_result: Optional callback called with (winner, confidence) as soon as both
+      lines have streamed in, before the reasoning is complete
+    - research_model: Claude model used to summarize research (default: model_name). Runs
+      comparing several models use one research model so research is shared between them
     
     Returns:
-    - Prediction result (winner, confidence, reasoning)
+    - Prediction result (winner, confidence, reasoning). If Claude stays unavailable until the
+      game deadline, CircuitOpenError is raised instead of making a fallback pick, so the game
+      can be predicted again later
     """
     # Extract game information
     team1 = game_data["team1"]["name"]
@@ -38,8 +75,10 @@ async def predict_game(game_data, anthropic_client, model_name="claude-3-7-sonne
     
     logger.info(f"Starting prediction for {team1} vs {team2} in {region} region ({round_name})")
     
-    # Initialize conversation history
-    messages = []
+    # Deadlines for research and for the whole game
+    game_start = time.monotonic()
+    final_deadline = game_start + game_deadline if game_deadline else None
+    research_deadline = game_start + game_deadline * RESEARCH_DEADLINE_SHARE if game_deadline else None
     
     # System prompt
     system_prompt = """You are a basketball analysis expert assisting with March Madness predictions for a complete tournament bracket.
@@ -57,131 +96,6 @@ Analyze the provided information about each matchup carefully to make accurate p
 Your goal is to provide an accurate, well-reasoned prediction based on the available data, regardless of which round the game is in.
 """
     
-    # Create initial user message with team records
-    try:
-        from context import get_team_records
-        team1_record = get_team_records(team1) or "record not available"
-        team2_record = get_team_records(team2) or "record not available"
-        
-        initial_message = f"""I need you to analyze the March Madness matchup between {team1} (Seed #{seed1}, {team1_record}) and {team2} (Seed #{seed2}, {team2_record}) in the {region} region during the {round_name}.
-
-This is part of a complete bracket prediction, so please analyze this matchup regardless of which tournament round it occurs in. For games beyond the first round, assume both teams have advanced to this point.
-
-I'll provide detailed information about both teams, historical seed matchups, and expert predictions gathered from multiple sources. Based on this comprehensive analysis, I'd like you to predict which team will win."""
-    except Exception as e:
-        logger.warning(f"Could not add team records: {str(e)}")
-        initial_message = f"""I need you to analyze the March Madness matchup between {team1} (Seed #{seed1}) and {team2} (Seed #{seed2}) in the {region} region during the {round_name}.
-
-This is part of a complete bracket prediction, so please analyze this matchup regardless of which tournament round it occurs in. For games beyond the first round, assume both teams have advanced to this point.
-
-I'll provide detailed information about both teams, historical seed matchups, and expert predictions gathered from multiple sources. Based on this comprehensive analysis, I'd like you to predict which team will win."""
-    
-    # Add historical seed matchup info
-    try:
-        upset_factors = get_upset_factors_by_seed_matchup(seed1, seed2)
-        upset_rate = upset_factors.get("upset_rate", 0)
-        
-        if seed1 < seed2:
-            # Team1 is the better seed
-            lower_seed_team = team1
-            higher_seed_team = team2
-            lower_seed = seed1
-            higher_seed = seed2
-        else:
-            # Team2 is the better seed
-            lower_seed_team = team2
-            higher_seed_team = team1
-            lower_seed = seed2
-            higher_seed = seed1
-        
-        # Add seed matchup historical data
-        initial_message += f"\n\nHistorical Note: In March Madness history, #{higher_seed} seeds upset #{lower_seed} seeds approximately {upset_rate:.0%} of the time."
-        
-    except Exception as e:
-        logger.warning(f"Could not add upset factors: {str(e)}")
-    
-    user_message = {
-        "role": "user",
-        "content": [
-            {
-                "type": "text",
-                "text": initial_message
-            }
-        ]
-    }
-    
-    messages.append(user_message)
-    
-    # If using enhanced analysis, perform multi-query search and analysis
-    if use_enhanced_analysis:
-        try:
-            # Get multiple search results organized by query type
-            logger.info("Starting enhanced multi-query analysis")
-            multi_results = await search_matchup_multi(team1, team2, seed1, seed2, region, round_name)
-            
-            # Log the number of results found for each query type
-            for query_type, data in multi_results.items():
-                result_count = len(data["results"])
-                logger.info(f"Found {result_count} results for {query_type}")
-                print(f"Found {result_count} results for {query_type} query")
-            
-            # Fetch and analyze sources for each query type
-            logger.info("Analyzing search results using multiple Claude instances")
-            analysis_results = await fetch_and_analyze_sources(multi_results, anthropic_client, model_name)
-            
-            # Add each analysis to the conversation
-            for query_type, data in analysis_results.items():
-                summary = data["summary"]
-                sources = data["sources"]
-                
-                # Format title based on query type
-                if query_type == "matchup":
-                    title = f"Analysis of {team1} vs {team2} Matchup"
-                elif query_type.endswith("_analysis"):
-                    team_name = query_type.replace("_analysis", "")
-                    title = f"Analysis of {team_name}"
-                elif query_type == "predictions":
-                    title = f"Expert Predictions for {team1} vs {team2}"
-                elif query_type == "seed_history":
-                    title = f"Historical Analysis of #{seed1} vs #{seed2} Seed Matchups"
-                else:
-                    title = f"Analysis for {query_type}"
-                
-                # Add Claude's analysis to the conversation
-                assistant_message = {
-                    "role": "assistant",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"I'll review the {title}."
-                        }
-                    ]
-                }
-                
-                user_message = {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"## {title}\n\n{summary}\n\nSources: {', '.join(sources) if sources else 'No sources available'}"
-                        }
-                    ]
-                }
-                
-                messages.append(assistant_message)
-                messages.append(user_message)
-                
-            logger.info("All analyses added to conversation")
-            
-        except Exception as e:
-            logger.error(f"Error in enhanced analysis: {str(e)}", exc_info=True)
-            print(f"Error in enhanced analysis: {str(e)}")
-            # Fall back to standard search if enhanced analysis fails
-            await add_standard_search_results(messages, team1, team2, seed1, seed2, region, round_name)
-    else:
-        # Use standard search approach
-        await add_standard_search_results(messages, team1, team2, seed1, seed2, region, round_name)
-    
     # Final prompt for prediction
     final_prompt = f"""
 Based on all the information I've shared about {team1} and {team2}, please provide your prediction for this March Madness matchup.
@@ -201,10 +115,28 @@ Please format your response as:
 PREDICTED WINNER: [Team Name]
 CONFIDENCE: [XX]% (a number between 50-100)
 REASONING: [2-3 key decisive factors that led to your prediction]
+{PREDICTION_END_MARKER}
 
 Your response should be concise and focused only on the prediction.
 """
     
+    # Research the matchup; shared with other models and speculative predictions of the same matchup
+    messages = await get_matchup_research(game_data, anthropic_client, research_model or model_name,
+                                          use_enhanced_analysis, http_session, research_deadline)
+    
+    # Predictions persist across runs, keyed by the matchup, models, prompts and the research itself,
+    # so research rebuilt from new articles gets a new prediction (cached research makes this cheap)
+    prompt_hash = hashlib.sha256(f"{system_prompt}\n{final_prompt}".encode("utf-8")).hexdigest()
+    prediction_key = make_cache_key("prediction", team1, seed1, team2, seed2, round_name, model_name,
+                                    research_model or model_name, use_enhanced_analysis, prompt_hash,
+                                    make_cache_key(messages))
+    prediction_cache = get_cache("predictions")
+    if prediction_cache is not None:
+        cached_prediction = await asyncio.to_thread(prediction_cache.get, prediction_key)
+        if cached_prediction is not None:
+            logger.info(f"Using cached prediction for {team1} vs {team2}: {cached_prediction['predicted_winner']}")
+            return cached_prediction
+    
     assistant_message = {
         "role": "assistant",
         "content": [
@@ -232,51 +164,50 @@ Your response should be concise and focused only on the prediction.
     try:
         logger.info(f"Sending final prediction request to Claude ({len(messages)} messages)")
         
-        # Add retry logic for Claude API calls
-        max_retries = 3
-        retry_count = 0
-        response = None
+        # Time left in the game's budget for the final call (never less than the minimum)
+        final_timeout = None
+        if final_deadline is not None:
+            final_timeout = max(remaining_time(final_deadline), MIN_FINAL_PREDICTION_SECONDS)
         
-        while retry_count < max_retries:
-            try:
-                response = anthropic_client.messages.create(
-                    model=model_name,
-                    max_tokens=1000,
-                    messages=messages,
-                    system=system_prompt
-                )
-                break  # If successful, exit the retry loop
-            except Exception as e:
-                retry_count += 1
-                logger.warning(f"Claude API error (attempt {retry_count}/{max_retries}): {str(e)}")
-                if retry_count < max_retries:
-                    wait_time = 2 ** retry_count  # Exponential backoff
-                    logger.info(f"Retrying in {wait_time} seconds...")
-                    await asyncio.sleep(wait_time)
-                else:
-                    logger.error(f"Max retries reached. Using fallback prediction.")
-                    raise  # Re-raise to trigger the fallback
+        # Send through the shared executor (retries, rate limits and circuit breaker). A seed-based
+        # fallback would be recorded in the bracket for good, so while Claude is briefly overloaded
+        # the call waits for the circuit to close instead of failing fast
+        try:
+            response_text = await asyncio.wait_for(get_executor().execute(
+                "anthropic",
+                lambda: stream_prediction(anthropic_client, model_name, messages, system_prompt, on_early_result),
+                governor=get_governor("anthropic"),
+                tokens=estimate_messages_token_count(messages, system_prompt),
+                wait_for_circuit=True
+            ), timeout=final_timeout)
+        except asyncio.TimeoutError:
+            if get_executor().get_breaker("anthropic").opened_at is not None:
+                # Out of time while Claude is unavailable: leave the game unpredicted so it can be retried
+                raise CircuitOpenError(f"Claude unavailable until the game deadline for {team1} vs {team2}")
+            logger.error("Claude API request timed out. Using fallback prediction.")
+            raise
+        except Exception as e:
+            logger.error(f"Claude API request failed after retries: {str(e)}. Using fallback prediction.")
+            raise  # Re-raise to trigger the fallback
         
         # If we got this far, we have a response
-        response_text = response.content[0].text
         logger.debug(f"Claude prediction response: {response_text}")
         
         # Extract prediction using regex
-        winner_match = re.search(r"PREDICTED WINNER:\s*(.*?)(?:\n|$)", response_text)
-        confidence_match = re.search(r"CONFIDENCE:\s*(\d+)%", response_text)
-        reasoning_match = re.search(r"REASONING:\s*(.*?)(?:\n\n|$)", response_text, re.DOTALL)
+        winner_match, confidence_match, reasoning_match = parse_prediction_fields(response_text)
         
         # Add retry logic for parsing failures
         if not (winner_match and confidence_match and reasoning_match):
             # Try one more time with a more direct prompt
             logger.warning("Failed to parse prediction format. Retrying with a clearer prompt.")
             
-            clarification_prompt = """
+            clarification_prompt = f"""
 I couldn't parse your prediction clearly. Please respond ONLY with the following format:
 
 PREDICTED WINNER: [Team Name]
 CONFIDENCE: [XX]% (a number between 50-100)
 REASONING: [2-3 key decisive factors]
+{PREDICTION_END_MARKER}
             """
             
             # Add the clarification message
@@ -295,20 +226,18 @@ REASONING: [2-3 key decisive factors]
             
             # Try again
             try:
-                retry_response = anthropic_client.messages.create(
-                    model=model_name,
-                    max_tokens=1000,
-                    messages=messages,
-                    system=system_prompt
+                response_text = await get_executor().execute(
+                    "anthropic",
+                    lambda: stream_prediction(anthropic_client, model_name, messages, system_prompt, on_early_result),
+                    governor=get_governor("anthropic"),
+                    tokens=estimate_messages_token_count(messages, system_prompt),
+                    wait_for_circuit=True
                 )
                 
-                response_text = retry_response.content[0].text
                 logger.debug(f"Claude retry response: {response_text}")
                 
                 # Try parsing again
-                winner_match = re.search(r"PREDICTED WINNER:\s*(.*?)(?:\n|$)", response_text)
-                confidence_match = re.search(r"CONFIDENCE:\s*(\d+)%", response_text)
-                reasoning_match = re.search(r"REASONING:\s*(.*?)(?:\n\n|$)", response_text, re.DOTALL)
+                winner_match, confidence_match, reasoning_match = parse_prediction_fields(response_text)
             except Exception as e:
                 logger.error(f"Error in parsing retry: {str(e)}")
         
@@ -349,6 +278,10 @@ REASONING: [2-3 key decisive factors]
                 "sources": extract_sources_from_messages(messages)
             }
             logger.info(f"Successful prediction: {prediction['predicted_winner']} with {prediction['confidence']}% confidence")
+            
+            # Fallback predictions below are not cached, so the next run asks Claude again
+            if prediction_cache is not None:
+                await asyncio.to_thread(prediction_cache.set, prediction_key, prediction)
             return prediction
         else:
             logger.warning(f"Failed to parse Claude response: {response_text}")
@@ -361,6 +294,8 @@ REASONING: [2-3 key decisive factors]
                 "sources": extract_sources_from_messages(messages)
             }
             
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"Error getting prediction from Claude: {str(e)}", exc_info=True)
         
@@ -374,7 +309,321 @@ REASONING: [2-3 key decisive factors]
         logger.info(f"Using fallback prediction: {fallback['predicted_winner']}")
         return fallback
 
-async def add_standard_search_results(messages, team1, team2, seed1, seed2, region, round_name):
+def parse_prediction_fields(response_text):
+    """
+    Extract the structured prediction fields from Claude's response.
+    
+    Parameters:
+    - response_text: Full or partial response text
+    
+    Returns:
+    - Tuple of regex matches (winner, confidence, reasoning); each is None if not found
+    """
+    winner_match = re.search(r"PREDICTED WINNER:\s*(.*?)(?:\n|$)", response_text)
+    confidence_match = re.search(r"CONFIDENCE:\s*(\d+)%", response_text)
+    # The reasoning must have some text; an empty one counts as not found
+    reasoning_match = re.search(r"REASONING:\s*(\S.*?)(?:\n\n|" + PREDICTION_END_MARKER + r"|$)", response_text,
+                                re.DOTALL)
+    return winner_match, confidence_match, reasoning_match
+
+async def stream_prediction(anthropic_client, model_name, messages, system_prompt, on_early_result=None):
+    """
+    Stream the final prediction and stop as soon as the structured block is complete.
+    
+    Generation ends server-side at the end marker (sent as a stop sequence). If the model
+    instead finishes the reasoning with a blank line, the stream is closed client-side.
+    
+    Parameters:
+    - anthropic_client: Initialized AsyncAnthropic client
+    - model_name: Claude model to use
+    - messages: Conversation so far
+    - system_prompt: System prompt for the prediction
+    - on_early_result: Optional callback called once with (winner, confidence) as soon as
+      both lines are complete
+    
+    Returns:
+    - Response text received before the stream ended
+    """
+    stream = await anthropic_client.messages.create(
+        model=model_name,
+        max_tokens=PREDICTION_MAX_TOKENS,
+        messages=messages,
+        system=system_prompt,
+        stop_sequences=[PREDICTION_END_MARKER],
+        stream=True
+    )
+    
+    response_text = ""
+    early_result_sent = False
+    try:
+        async for event in stream:
+            if event.type != "content_block_delta" or getattr(event.delta, "type", None) != "text_delta":
+                continue
+            response_text += event.delta.text
+            
+            # The winner line is complete once its newline has arrived
+            if on_early_result is not None and not early_result_sent:
+                winner_match = re.search(r"PREDICTED WINNER:\s*(.*?)\n", response_text)
+                confidence_match = re.search(r"CONFIDENCE:\s*(\d+)%", response_text)
+                if winner_match and confidence_match:
+                    early_result_sent = True
+                    try:
+                        on_early_result(winner_match.group(1).strip(), int(confidence_match.group(1)))
+                    except Exception as e:
+                        logger.warning(f"Early prediction callback failed: {str(e)}")
+            
+            # Stop reading once the reasoning paragraph is finished (a blank line before the
+            # reasoning starts, e.g. "REASONING:\n\n1. ...", doesn't end it)
+            reasoning_start = response_text.find("REASONING:")
+            if reasoning_start != -1:
+                reasoning = response_text[reasoning_start + len("REASONING:"):].lstrip()
+                if "\n\n" in reasoning or PREDICTION_END_MARKER in reasoning:
+                    logger.debug("Prediction block complete; closing stream")
+                    break
+    finally:
+        await stream.close()
+    
+    return response_text
+
+async def research_matchup(game_data, anthropic_client, model_name, use_enhanced_analysis=True, http_session=None,
+                          research_deadline=None):
+    """
+    Build the conversation that introduces a matchup and adds all research about it.
+    
+    Parameters:
+    - game_data: Dictionary with game information
+    - anthropic_client: Initialized AsyncAnthropic client
+    - model_name: Claude model used to summarize sources
+    - use_enhanced_analysis: If True, use the multi-query, multi-analysis approach
+    - http_session: Shared aiohttp session for searches and page fetches
+    - research_deadline: time.monotonic() deadline for the research (None for no limit)
+    
+    Returns:
+    - List of messages ending with the research, ready for the final prediction prompt (complete
+      enhanced research is cached, so a later run rebuilds it only if one of its inputs changed)
+    """
+    team1 = game_data["team1"]["name"]
+    team2 = game_data["team2"]["name"]
+    seed1 = game_data["team1"]["seed"]
+    seed2 = game_data["team2"]["seed"]
+    region = game_data["region"]
+    round_name = get_round_name(game_data["game_id"])
+    
+    # Initialize conversation history
+    messages = []
+    
+    # Create initial user message with team records
+    try:
+        from context import get_team_records
+        team1_record = get_team_records(team1) or "record not available"
+        team2_record = get_team_records(team2) or "record not available"
+        
+        initial_message = f"""I need you to analyze the March Madness matchup between {team1} (Seed #{seed1}, {team1_record}) and {team2} (Seed #{seed2}, {team2_record}) in the {region} region during the {round_name}.
+
+This is part of a complete bracket prediction, so please analyze this matchup regardless of which tournament round it occurs in. For games beyond the first round, assume both teams have advanced to this point.
+
+I'll provide detailed information about both teams, historical seed matchups, and expert predictions gathered from multiple sources. Based on this comprehensive analysis, I'd like you to predict which team will win."""
+    except Exception as e:
+        logger.warning(f"Could not add team records: {str(e)}")
+        initial_message = f"""I need you to analyze the March Madness matchup between {team1} (Seed #{seed1}) and {team2} (Seed #{seed2}) in the {region} region during the {round_name}.
+
+This is part of a complete bracket prediction, so please analyze this matchup regardless of which tournament round it occurs in. For games beyond the first round, assume both teams have advanced to this point.
+
+I'll provide detailed information about both teams, historical seed matchups, and expert predictions gathered from multiple sources. Based on this comprehensive analysis, I'd like you to predict which team will win."""
+    
+    # Add historical seed matchup info
+    try:
+        upset_factors = get_upset_factors_by_seed_matchup(seed1, seed2)
+        upset_rate = upset_factors.get("upset_rate", 0)
+        
+        if seed1 < seed2:
+            # Team1 is the better seed
+            lower_seed_team = team1
+            higher_seed_team = team2
+            lower_seed = seed1
+            higher_seed = seed2
+        else:
+            # Team2 is the better seed
+            lower_seed_team = team2
+            higher_seed_team = team1
+            lower_seed = seed2
+            higher_seed = seed1
+        
+        # Add seed matchup historical data
+        initial_message += f"\n\nHistorical Note: In March Madness history, #{higher_seed} seeds upset #{lower_seed} seeds approximately {upset_rate:.0%} of the time."
+        
+    except Exception as e:
+        logger.warning(f"Could not add upset factors: {str(e)}")
+    
+    user_message = {
+        "role": "user",
+        "content": [
+            {
+                "type": "text",
+                "text": initial_message
+            }
+        ]
+    }
+    
+    messages.append(user_message)
+    
+    # Finished research is kept across runs, keyed by everything it was built from
+    research_key = make_cache_key("research", team1, seed1, team2, seed2, region, round_name, model_name,
+                                  use_enhanced_analysis, RESEARCH_PROMPT_VERSION, SUMMARY_PROMPT_VERSION,
+                                  MAX_CONTENT_LENGTH, initial_message)
+    research_cache = get_cache("research")
+    if research_cache is not None:
+        cached_messages = await asyncio.to_thread(research_cache.get, research_key)
+        if cached_messages is not None:
+            logger.info(f"Using cached research for {team1} vs {team2}")
+            return cached_messages
+    complete = False
+    
+    # If using enhanced analysis, perform multi-query search and analysis
+    if use_enhanced_analysis:
+        try:
+            # Get multiple search results organized by query type
+            logger.info("Starting enhanced multi-query analysis")
+            # Team-level research is shared across games and may already be prefetched
+            team_research = {
+                team: get_team_research(team, anthropic_client, model_name, http_session)
+                for team in (team1, team2)
+            }
+            multi_results = await search_matchup_multi(team1, team2, seed1, seed2, region, round_name, http_session,
+                                                       deadline=research_deadline, team_research=team_research)
+            
+            # Log the number of results found for each query type
+            for query_type, data in multi_results.items():
+                if "team_research" in data:
+                    status = "ready" if data["team_research"]["task"].done() else "in progress"
+                    logger.info(f"Using shared team research for {query_type} ({status})")
+                    continue
+                result_count = len(data["results"])
+                logger.info(f"Found {result_count} results for {query_type}")
+                print(f"Found {result_count} results for {query_type} query")
+            
+            # Fetch and analyze sources for each query type
+            logger.info("Analyzing search results using multiple Claude instances")
+            analysis_results = await fetch_and_analyze_sources(multi_results, anthropic_client, model_name, http_session,
+                                                               deadline=research_deadline)
+            
+            # Add each analysis to the conversation
+            for query_type, data in analysis_results.items():
+                summary = data["summary"]
+                sources = data["sources"]
+                
+                # Format title based on query type
+                if query_type == "matchup":
+                    title = f"Analysis of {team1} vs {team2} Matchup"
+                elif query_type.endswith("_analysis"):
+                    team_name = query_type.replace("_analysis", "")
+                    title = f"Analysis of {team_name}"
+                elif query_type == "predictions":
+                    title = f"Expert Predictions for {team1} vs {team2}"
+                elif query_type == "seed_history":
+                    title = f"Historical Analysis of #{seed1} vs #{seed2} Seed Matchups"
+                else:
+                    title = f"Analysis for {query_type}"
+                
+                # Add Claude's analysis to the conversation
+                assistant_message = {
+                    "role": "assistant",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": f"I'll review the {title}."
+                        }
+                    ]
+                }
+                
+                user_message = {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": f"## {title}\n\n{summary}\n\nSources: {', '.join(sources) if sources else 'No sources available'}"
+                        }
+                    ]
+                }
+                
+                messages.append(assistant_message)
+                messages.append(user_message)
+                
+            # Research cut short by the deadline or missing sources is redone next run
+            complete = len(analysis_results) == len(multi_results) and not any(
+                data["degraded"] for data in analysis_results.values())
+            
+            if analysis_results:
+                logger.info("All analyses added to conversation")
+            else:
+                # Nothing arrived in time: predict from seeds and general knowledge
+                logger.warning("No analyses completed before the research deadline; using seed-only context")
+                add_seed_only_context(messages, team1, team2, seed1, seed2)
+            
+        except Exception as e:
+            logger.error(f"Error in enhanced analysis: {str(e)}", exc_info=True)
+            print(f"Error in enhanced analysis: {str(e)}")
+            # Fall back to standard search if enhanced analysis fails
+            await add_standard_search_results(messages, team1, team2, seed1, seed2, region, round_name, http_session,
+                                              deadline=research_deadline)
+    else:
+        # Use standard search approach
+        await add_standard_search_results(messages, team1, team2, seed1, seed2, region, round_name, http_session,
+                                              deadline=research_deadline)
+    
+    if complete and research_cache is not None:
+        await asyncio.to_thread(research_cache.set, research_key, messages)
+    
+    return messages
+
+async def get_matchup_research(game_data, anthropic_client, model_name, use_enhanced_analysis=True, http_session=None,
+                               research_deadline=None):
+    """
+    Get the research conversation for a matchup, reusing research already done this run.
+    
+    Predictions of the same matchup (by other models, or speculative predictions of a
+    later-round game) share one research task, as long as its deadline is no earlier than
+    the caller's. A caller with a later deadline (e.g. the real game after a speculative
+    prediction started the research) gets a new task; its searches, fetches and summaries
+    join the ones already in flight, so the work isn't repeated.
+    
+    Returns:
+    - A copy of the research messages, which the caller may extend
+    """
+    key = (game_data["team1"]["name"], game_data["team2"]["name"], game_data["team1"]["seed"],
+           game_data["team2"]["seed"], game_data["region"], get_round_name(game_data["game_id"]),
+           model_name, use_enhanced_analysis)
+    entry = _matchup_research.get(key)
+    task = entry["task"] if entry is not None else None
+    if (task is None or (task.done() and (task.cancelled() or task.exception() is not None))
+            or not _deadline_covers(entry["deadline"], research_deadline)):
+        task = asyncio.ensure_future(research_matchup(game_data, anthropic_client, model_name, use_enhanced_analysis,
+                                                      http_session, research_deadline))
+        entry = {"task": task, "waiters": 0, "deadline": research_deadline}
+        _matchup_research[key] = entry
+    else:
+        logger.info(f"Reusing research for {key[0]} vs {key[1]}")
+    
+    # One caller giving up doesn't cancel research the others are waiting for, but once every
+    # caller has given up (e.g. all predictions of an eliminated pairing) the research stops too
+    messages = await wait_shared(entry)
+    return list(messages)
+
+def _deadline_covers(deadline, other):
+    """True if research bounded by `deadline` had at least as long as `other` allows (None is no limit)."""
+    return deadline is None or (other is not None and deadline >= other)
+
+async def cancel_matchup_research():
+    """Cancel matchup research still running and forget completed research."""
+    pending = [entry["task"] for entry in _matchup_research.values() if not entry["task"].done()]
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    _matchup_research.clear()
+
+async def add_standard_search_results(messages, team1, team2, seed1, seed2, region, round_name, http_session=None,
+                                      deadline=None):
     """
     Add standard search results to the conversation.
     Used as a fallback when enhanced analysis fails.
@@ -385,12 +634,15 @@ async def add_standard_search_results(messages, team1, team2, seed1, seed2, regi
     - seed1, seed2: Team seeds
     - region: Tournament region
     - round_name: Current round name
+    - http_session: Shared aiohttp session for searches and page fetches
+    - deadline: time.monotonic() deadline; sources not fetched by then are skipped
     """
     # Search for information about the matchup
     try:
         from data_fetcher import search_matchup, fetch_content
         logger.info("Using standard search approach")
-        search_results = await search_matchup(team1, team2, seed1, seed2, region, round_name)
+        search_results = await search_matchup(team1, team2, seed1, seed2, region, round_name, http_session,
+                                              deadline=deadline)
         logger.info(f"Found {len(search_results)} articles about {team1} vs {team2}")
         print(f"Found {len(search_results)} articles about the matchup")
     except Exception as e:
@@ -399,17 +651,24 @@ async def add_standard_search_results(messages, team1, team2, seed1, seed2, regi
     
     # Process each search result to gather content
     fetched_content = []
+    duplicate_filter = DuplicateFilter()
     for idx, result in enumerate(search_results):
         url = result.get('url')
         
         if not url:
             logger.warning(f"Search result {idx+1} has no URL")
             continue
+        
+        if deadline is not None and remaining_time(deadline) <= 0:
+            logger.warning(f"Deadline reached; skipping remaining {len(search_results) - idx} sources")
+            break
             
         try:
             # Fetch content
             logger.debug(f"Fetching content from {url}")
-            content = await fetch_content(url)
+            content = await asyncio.wait_for(fetch_content(url, http_session), timeout=remaining_time(deadline))
+            if content and duplicate_filter.check(url, content) is not None:
+                continue
             
             # Add to collected content
             fetched_content.append({
@@ -450,29 +709,40 @@ async def add_standard_search_results(messages, team1, team2, seed1, seed2, regi
     # If no content was fetched, add a note about that
     if not fetched_content:
         logger.warning("No content was fetched from sources")
-        
-        assistant_message = {
-            "role": "assistant",
-            "content": [
-                {
-                    "type": "text",
-                    "text": f"I'll analyze this matchup based on the teams' seeds and general March Madness tournament patterns."
-                }
-            ]
-        }
-        
-        user_message = {
-            "role": "user",
-            "content": [
-                {
-                    "type": "text",
-                    "text": f"No specific articles were found about this matchup. Please analyze based on the teams' seeds ({team1}: #{seed1}, {team2}: #{seed2}) and your knowledge of NCAA basketball and March Madness patterns."
-                }
-            ]
-        }
-        
-        messages.append(assistant_message)
-        messages.append(user_message)
+        add_seed_only_context(messages, team1, team2, seed1, seed2)
+
+def add_seed_only_context(messages, team1, team2, seed1, seed2):
+    """
+    Add a note asking Claude to predict from seeds and general knowledge only.
+    Used when no source content is available (or none arrived before the deadline).
+    
+    Parameters:
+    - messages: Conversation messages list to append to
+    - team1, team2: Team names
+    - seed1, seed2: Team seeds
+    """
+    assistant_message = {
+        "role": "assistant",
+        "content": [
+            {
+                "type": "text",
+                "text": f"I'll analyze this matchup based on the teams' seeds and general March Madness tournament patterns."
+            }
+        ]
+    }
+    
+    user_message = {
+        "role": "user",
+        "content": [
+            {
+                "type": "text",
+                "text": f"No specific articles were found about this matchup. Please analyze based on the teams' seeds ({team1}: #{seed1}, {team2}: #{seed2}) and your knowledge of NCAA basketball and March Madness patterns."
+            }
+        ]
+    }
+    
+    messages.append(assistant_message)
+    messages.append(user_message)
 
 def extract_sources_from_messages(messages):
     """
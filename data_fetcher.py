@@ -6,16 +6,158 @@ Handles fetching data about basketball teams and matchups.
 """
 
 import os
+import re
 import asyncio
 import aiohttp
 import logging
 import json
+import time
 import random
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
+from urllib.parse import urlparse
+from rate_limiter import ThrottledError, get_governor, parse_retry_after
+from request_executor import HTTPStatusError, CircuitOpenError, get_executor
+from utils import estimate_messages_token_count, gather_until_deadline
+from cache import get_cache, make_cache_key
+from source_dedup import DuplicateFilter, record_replacement
+from local_index import search_local, index_article
+from source_ranking import (SOURCES_PER_QUERY, PERMANENT_FAILURE_STATUSES, rank_sources, record_fetch,
+                            record_fallback)
 
 # Set up logger
 logger = logging.getLogger('data_fetcher')
 
+# Run-scoped team research, keyed by (team name, model): {"task": asyncio.Task, "started": bool}
+_team_research = {}
+
+# Bounds speculative (prefetch) research so it only uses spare capacity; None disables prefetching
+_prefetch_semaphore = None
+_prefetch_concurrency = 0
+
+# In-flight operations shared by identical concurrent requests: key -> {"task": asyncio.Task, "waiters": int}
+_inflight = {}
+_coalescing_stats = {"started": 0, "joined": 0}
+
+# Worker processes for HTML-to-text extraction; None extracts inline on the event loop
+_extraction_pool = None
+_extraction_slots = None  # Bounds pages queued for or being extracted at once
+
+# Characters of extracted text kept per source
+MAX_CONTENT_LENGTH = 8000
+
+# Cached page text is served without a request for this long, then revalidated with a conditional GET
+PAGE_FRESH_SECONDS = 60 * 60
+
+# Version of the source summary prompts; bump it when they change so cached summaries are regenerated
+SUMMARY_PROMPT_VERSION = 1
+
+# Summaries of sources that Claude failed to analyze start with this
+SUMMARY_ERROR_PREFIX = "Error analyzing sources"
+
+# Exa search endpoint
+EXA_SEARCH_URL = "https://api.exa.ai/search"
+
+# Connection pool settings for the run-scoped HTTP session
+HTTP_TIMEOUT_SECONDS = 30  # Total time allowed per request
+HTTP_CONNECT_TIMEOUT_SECONDS = 10  # Time allowed to establish a connection
+HTTP_MAX_CONNECTIONS = 64  # Total open connections across all hosts
+HTTP_MAX_CONNECTIONS_PER_HOST = 8  # Open connections to any single host (Exa, ESPN, ...)
+HTTP_KEEPALIVE_SECONDS = 60  # How long idle connections are kept for reuse
+HTTP_DNS_CACHE_SECONDS = 600  # How long resolved host addresses are cached
+
+def create_http_session():
+    """
+    Create the run-scoped HTTP session shared by all Exa searches and page fetches.
+    
+    Reusing one session keeps TCP/TLS connections alive between requests and caches DNS
+    lookups, so each search or fetch doesn't pay for a fresh handshake. Must be called
+    from within the running event loop, and closed by the caller when the run ends.
+    
+    Returns:
+    - aiohttp.ClientSession with a tuned connection pool
+    """
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_MAX_CONNECTIONS,
+        limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+        ttl_dns_cache=HTTP_DNS_CACHE_SECONDS,
+        use_dns_cache=True
+    )
+    timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+    logger.debug(f"Creating shared HTTP session (limit={HTTP_MAX_CONNECTIONS}, per host={HTTP_MAX_CONNECTIONS_PER_HOST})")
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+@asynccontextmanager
+async def _session_scope(http_session):
+    """Yield the shared session if one was given, otherwise a temporary session for this request."""
+    if http_session is not None:
+        yield http_session
+        return
+    
+    timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        yield session
+
+async def _coalesce(key, operation):
+    """
+    Run an operation once for all concurrent callers asking for the same key (singleflight).
+    
+    The first caller starts the operation; callers arriving while it is still running wait
+    for the same result (or exception) instead of issuing a duplicate request. A caller
+    being cancelled doesn't cancel the shared operation unless it was the last one waiting.
+    
+    Parameters:
+    - key: Hashable identity of the request
+    - operation: Zero-argument coroutine function performing the request
+    
+    Returns:
+    - Result of the shared operation
+    """
+    entry = _inflight.get(key)
+    if entry is None:
+        entry = {"task": asyncio.ensure_future(operation()), "waiters": 0}
+        _inflight[key] = entry
+        entry["task"].add_done_callback(lambda _: _inflight.pop(key, None))
+        _coalescing_stats["started"] += 1
+    else:
+        _coalescing_stats["joined"] += 1
+        logger.debug(f"Joining in-flight {key[0]} request")
+    
+    return await wait_shared(entry)
+
+async def wait_shared(entry):
+    """
+    Wait for a task shared between callers, counting the callers still waiting.
+    
+    A caller being cancelled doesn't cancel the shared task unless it was the last one
+    waiting, in which case the task is stopped too (nobody needs its result any more).
+    
+    Parameters:
+    - entry: Dictionary holding the shared "task" and its "waiters" count
+    
+    Returns:
+    - Result of the shared task
+    """
+    entry["waiters"] += 1
+    try:
+        return await asyncio.shield(entry["task"])
+    finally:
+        entry["waiters"] -= 1
+        if entry["waiters"] == 0 and not entry["task"].done():
+            # Every caller gave up (e.g. deadline reached), so stop the shared task too
+            entry["task"].cancel()
+
+def log_coalescing_stats():
+    """Log how many requests were served by joining an identical in-flight request."""
+    started = _coalescing_stats["started"]
+    joined = _coalescing_stats["joined"]
+    if started or joined:
+        logger.info(f"Request coalescing: {started} requests sent, {joined} duplicate requests joined in flight")
+
 def generate_search_queries(team1_name, team2_name, seed1, seed2, region, round_name):
     """
     Generate multiple search queries for a matchup to gather diverse information.
@@ -35,8 +177,8 @@ def generate_search_queries(team1_name, team2_name, seed1, seed2, region, round_
     # Additional query variations to capture different aspects
     queries = [
         base_query,  # The general matchup
-        f"{team1_name} basketball team statistics 2025 analysis strengths weaknesses",  # Team 1 analysis
-        f"{team2_name} basketball team statistics 2025 analysis strengths weaknesses",  # Team 2 analysis
+        team_analysis_query(team1_name),  # Team 1 analysis
+        team_analysis_query(team2_name),  # Team 2 analysis
         f"{team1_name} vs {team2_name} basketball prediction odds March Madness 2025",  # Predictions
         f"#{seed1} seed vs #{seed2} seed historical NCAA tournament matchup statistics",  # Seed matchup history
     ]
@@ -44,7 +186,15 @@ def generate_search_queries(team1_name, team2_name, seed1, seed2, region, round_
     logger.info(f"Generated {len(queries)} search queries for {team1_name} vs {team2_name}")
     return queries
 
-async def search_matchup_multi(team1_name, team2_name, seed1, seed2, region, round_name):
+def team_analysis_query(team_name):
+    """
+    Build the team-level search query. It doesn't depend on the opponent or round,
+    so its research can be shared by every game the team plays.
+    """
+    return f"{team_name} basketball team statistics 2025 analysis strengths weaknesses"
+
+async def search_matchup_multi(team1_name, team2_name, seed1, seed2, region, round_name, http_session=None,
+                               deadline=None, team_research=None):
     """
     Perform multiple searches for a matchup using various query strategies.
     
@@ -53,19 +203,31 @@ async def search_matchup_multi(team1_name, team2_name, seed1, seed2, region, rou
     - seed1, seed2: Team seeds
     - region: Tournament region
     - round_name: Current round name
+    - http_session: Shared aiohttp session (a temporary one is used per request if None)
+    - deadline: time.monotonic() deadline; searches still running then are cancelled
+    - team_research: Optional dictionary of team name -> shared team research entry (see
+      get_team_research). Team queries for these teams are not searched again
     
     Returns:
     - Dictionary mapping query types to search results
     """
     queries = generate_search_queries(team1_name, team2_name, seed1, seed2, region, round_name)
+    team_research = team_research or {}
+    query_teams = {1: team1_name, 2: team2_name}
+    # Team names an indexed article must mention to answer each query locally (seeds are always required)
+    required_names = {0: (team1_name, team2_name), 1: (team1_name,), 2: (team2_name,), 3: (team1_name, team2_name)}
     
-    # Execute all searches in parallel
+    # Execute all searches in parallel, skipping team queries that already have shared research
     search_tasks = []
-    for query in queries:
-        search_tasks.append(search_with_query(query))
+    for i, query in enumerate(queries):
+        if query_teams.get(i) in team_research:
+            search_tasks.append(_no_search())
+        else:
+            search_tasks.append(search_local_first(query, http_session, required_names.get(i, ())))
     
-    # Wait for all searches to complete
-    results = await asyncio.gather(*search_tasks)
+    # Wait for all searches to complete (or the deadline, treating late searches as empty)
+    results = await gather_until_deadline(search_tasks, deadline)
+    results = [result or [] for result in results]
     
     # Combine results with query information
     combined_results = {}
@@ -88,19 +250,80 @@ async def search_matchup_multi(team1_name, team2_name, seed1, seed2, region, rou
             "query": query,
             "results": results[i]
         }
+        if query_teams.get(i) in team_research:
+            combined_results[query_type]["team_research"] = team_research[query_teams[i]]
     
     return combined_results
 
-async def search_with_query(query):
+async def search_local_first(query, http_session=None, required=()):
+    """
+    Answer a query from the local index of fetched articles, searching Exa only if too few
+    indexed articles match it.
+    
+    Parameters:
+    - query: Search query string
+    - http_session: Shared aiohttp session (a temporary one is used if None)
+    - required: Phrases (e.g. team names) every locally matched article must mention
+    
+    Returns:
+    - List of search results (results from the local index include their text)
+    """
+    local_results = await search_local(query, SOURCES_PER_QUERY, required)
+    if local_results is not None:
+        return local_results
+    return await search_with_query(query, http_session)
+
+async def _no_search():
+    """Placeholder for a search that is covered by shared team research."""
+    return []
+
+async def search_with_query(query, http_session=None):
     """
     Execute a single search query using Exa API.
     
+    Results are cached on disk across runs, and identical queries issued concurrently (e.g.
+    the same seed history query from several first-round games) share one request.
+    
     Parameters:
     - query: Search query string
+    - http_session: Shared aiohttp session (a temporary one is used if None)
     
     Returns:
     - List of search results
     """
+    results = await _coalesce(("search", query), lambda: _cached_search_with_query(query, http_session))
+    return list(results)
+
+async def _cached_search_with_query(query, http_session=None):
+    """Serve a search from the stage journal or the persistent search cache, or send it and cache the results."""
+    # Queries differing only in case or spacing return the same results
+    normalized_query = " ".join(query.lower().split())
+    key = make_cache_key(EXA_SEARCH_URL, {"query": normalized_query})
+    
+    # A resumed run reuses the results it was working with, even if the cached copy has expired
+    journaled_results = await _read_journal(key)
+    if journaled_results is not None:
+        return journaled_results
+    
+    cache = get_cache("search")
+    if cache is None:
+        results = await _search_with_query(query, http_session)
+    else:
+        results = await asyncio.to_thread(cache.get, key)
+        if results is not None:
+            logger.debug(f"Search cache hit for query: {query[:50]}...")
+        else:
+            results = await _search_with_query(query, http_session)
+            # Empty results are usually a failed search, so they are retried next time
+            if results:
+                await asyncio.to_thread(cache.set, key, results)
+    
+    if results:
+        await _record_journal(key, results)
+    return results
+
+async def _search_with_query(query, http_session=None):
+    """Send an Exa search request (see search_with_query)."""
     try:
         # Get API key from environment
         api_key = os.environ.get("EXA_API_KEY")
@@ -111,61 +334,68 @@ async def search_with_query(query):
         logger.debug("Using Exa API key: [MASKED]")
         
         # Set up the API request
-        url = "https://api.exa.ai/search"
+        url = EXA_SEARCH_URL
         headers = {
             "x-api-key": api_key,
             "Content-Type": "application/json"
         }
         data = {"query": query}
         
-        # Make the request
-        timeout = aiohttp.ClientTimeout(total=30)  # 30 second timeout
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        # Make the request under the shared Exa rate limits
+        async with _session_scope(http_session) as session:
             logger.debug(f"Sending request to Exa API: {url}")
             logger.debug(f"Query: {query}")
             
-            async with session.post(url, headers=headers, json=data) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"Exa API error: Status {response.status}, Response: {error_text}")
-                    return []
-                
-                # Parse the response
-                response_text = await response.text()
-                search_results = json.loads(response_text)
-                
-                # Format results to match our expected structure
-                formatted_results = []
-                
-                # If the API response structure changes, adjust parsing here
-                if 'results' in search_results:
-                    for result in search_results['results']:
-                        formatted_result = {
-                            'url': result.get('url', ''),
-                            'title': result.get('title', ''),
-                            'publishedDate': result.get('publishedDate', ''),
-                            'snippet': result.get('snippet', '')
-                        }
-                        formatted_results.append(formatted_result)
-                
-                # Log results for debugging
-                logger.debug(f"Found {len(formatted_results)} search results for query: {query[:50]}...")
-                
-                # Return top 3 most recent results for each query to avoid overwhelming Claude
-                sorted_results = sorted(
-                    formatted_results,
-                    key=lambda x: x.get("publishedDate", ""),
-                    reverse=True
-                )
-                
-                return sorted_results[:3]
+            async def send_request():
+                async with session.post(url, headers=headers, json=data) as response:
+                    response_text = await response.text()
+                    if response.status == 429:
+                        raise ThrottledError("Exa API rate limit exceeded",
+                                             retry_after=parse_retry_after(response.headers.get("Retry-After")))
+                    if response.status != 200:
+                        raise HTTPStatusError(f"Exa API error: Status {response.status}, Response: {response_text}",
+                                              response.status)
+                    return response_text
+            
+            response_text = await get_executor().execute("exa", send_request, governor=get_governor("exa"))
+        
+        # Parse the response
+        search_results = json.loads(response_text)
+        
+        # Format results to match our expected structure
+        formatted_results = []
+        
+        # If the API response structure changes, adjust parsing here
+        if 'results' in search_results:
+            for result in search_results['results']:
+                formatted_result = {
+                    'url': result.get('url', ''),
+                    'title': result.get('title', ''),
+                    'publishedDate': result.get('publishedDate', ''),
+                    'snippet': result.get('snippet', '')
+                }
+                formatted_results.append(formatted_result)
+        
+        # Log results for debugging
+        logger.debug(f"Found {len(formatted_results)} search results for query: {query[:50]}...")
+        
+        # Return every result, most recent first; callers rank them and fetch only the
+        # best SOURCES_PER_QUERY, falling back to the next result when a fetch fails
+        sorted_results = sorted(
+            formatted_results,
+            key=lambda x: x.get("publishedDate", ""),
+            reverse=True
+        )
+        
+        return sorted_results
                 
     except Exception as e:
-        logger.error(f"Error in Exa search: {str(e)}", exc_info=True)
-        # Return empty list on error
+        # Retryable failures have already been retried by the executor
+        logger.error(f"Exa search failed for query '{query[:50]}...': {str(e)}")
         return []
 
-async def search_matchup(team1_name, team2_name, seed1, seed2, region, round_name):
+async def search_matchup(team1_name, team2_name, seed1, seed2, region, round_name, http_session=None,
+                         deadline=None):
     """
     Legacy method for compatibility - uses the multi-search approach but returns flattened results.
     
@@ -174,11 +404,14 @@ async def search_matchup(team1_name, team2_name, seed1, seed2, region, round_nam
     - seed1, seed2: Team seeds
     - region: Tournament region
     - round_name: Current round name
+    - http_session: Shared aiohttp session (a temporary one is used per request if None)
+    - deadline: time.monotonic() deadline; searches still running then are cancelled
     
     Returns:
     - List of search results (URLs and metadata)
     """
-    multi_results = await search_matchup_multi(team1_name, team2_name, seed1, seed2, region, round_name)
+    multi_results = await search_matchup_multi(team1_name, team2_name, seed1, seed2, region, round_name, http_session,
+                                             deadline)
     
     # Flatten results from all queries
     flattened_results = []
@@ -195,137 +428,588 @@ async def search_matchup(team1_name, team2_name, seed1, seed2, region, round_nam
             unique_urls.add(url)
             unique_results.append(result)
     
-    # Return top 5 most recent results
+    # Return top 5 most recent results, preferring sites that have been fetched reliably
     sorted_results = sorted(
         unique_results,
         key=lambda x: x.get("publishedDate", ""),
         reverse=True
     )
     
-    return sorted_results[:5]
+    return (await rank_sources(sorted_results))[:5]
 
-async def fetch_content(url):
+async def fetch_content(url, http_session=None):
     """
     Fetch and extract content from a URL.
     
+    Concurrent requests for the same URL (different queries often return the same
+    article) share one fetch.
+    
     Parameters:
     - url: URL to fetch
+    - http_session: Shared aiohttp session (a temporary one is used if None)
     
     Returns:
-    - Extracted and processed content
+    - Extracted and processed content (raises if the page could not be fetched)
+    """
+    return truncate_content(await fetch_full_content(url, http_session), MAX_CONTENT_LENGTH)
+
+async def fetch_full_content(url, http_session=None):
+    """
+    Fetch a URL and extract its full text, without truncating it to MAX_CONTENT_LENGTH.
+    
+    Parameters:
+    - url: URL to fetch
+    - http_session: Shared aiohttp session (a temporary one is used if None)
+    
+    Returns:
+    - Full extracted text (raises if the page could not be fetched)
+    """
+    return await _coalesce(("fetch", url), lambda: _fetch_content(url, http_session))
+
+async def _fetch_content(url, http_session=None):
     """
-    max_content_length = 8000  # Characters per source
+    Fetch a URL and extract its full text (see fetch_content).
+    
+    With the page cache enabled, recently fetched pages are served from disk, and older
+    ones are revalidated with a conditional GET so an unchanged page costs a 304 instead
+    of a download and another extraction pass.
+    """
+    # The cache keeps the full extracted text, so changing MAX_CONTENT_LENGTH doesn't refetch pages
+    cache = get_cache("pages")
+    key = make_cache_key(url)
+    cached_page = await asyncio.to_thread(cache.get, key) if cache is not None else None
+    if cached_page is not None and time.time() - cached_page["validated_at"] < PAGE_FRESH_SECONDS:
+        logger.debug(f"Page cache hit for URL: {url}")
+        return cached_page["text"]
+    
+    headers = {}
+    if cached_page is not None:
+        if cached_page.get("etag"):
+            headers["If-None-Match"] = cached_page["etag"]
+        if cached_page.get("last_modified"):
+            headers["If-Modified-Since"] = cached_page["last_modified"]
     
     logger.debug(f"Fetching content from URL: {url}")
     
-    try:
-        timeout = aiohttp.ClientTimeout(total=30)  # 30 second timeout
-        
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url) as response:
+    async with _session_scope(http_session) as session:
+        async def send_request():
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304 and headers:
+                    return None, response.headers
                 if response.status != 200:
-                    error_msg = f"Error: Could not fetch content (Status code: {response.status})"
-                    logger.error(error_msg)
-                    return error_msg
-                
-                logger.debug(f"Successfully fetched URL (status code: {response.status})")
-                html_content = await response.text()
-                
-                # Simple HTML content extraction
-                # In a production system, use a proper HTML parsing library like BeautifulSoup
-                # or a readability library like newspaper3k or trafilatura
-                
-                import re
-                
-                # Remove script and style tags and their contents
-                html_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL)
-                html_content = re.sub(r'<style[^>]*>.*?</style>', '', html_content, flags=re.DOTALL)
-                
-                # Remove all HTML tags
-                text_content = re.sub(r'<[^>]*>', ' ', html_content)
-                
-                # Replace multiple whitespace with single space
-                text_content = re.sub(r'\s+', ' ', text_content).strip()
-                
-                content_length = len(text_content)
-                logger.debug(f"Extracted text content: {content_length} characters")
-                
-                # Truncate content if too long, prioritizing beginning and end
-                if content_length > max_content_length:
-                    # Keep first 60% and last 40% of max length
-                    first_part_length = int(max_content_length * 0.6)
-                    last_part_length = max_content_length - first_part_length
-                    first_part = text_content[:first_part_length]
-                    last_part = text_content[-last_part_length:]
-                    text_content = first_part + "\n...[content truncated]...\n" + last_part
-                    logger.debug(f"Content truncated: {content_length} -> {len(text_content)} characters")
-                
-                return text_content
-    except aiohttp.ClientError as e:
-        error_msg = f"Error fetching URL: {str(e)}"
-        logger.error(error_msg)
-        return error_msg
-    except Exception as e:
-        error_msg = f"Unexpected error processing URL: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        return error_msg
+                    raise HTTPStatusError(f"Could not fetch content (Status code: {response.status})", response.status)
+                return await response.text(), response.headers
+        
+        # Each site gets its own circuit breaker, so one unreachable site fails fast
+        fetch_start = time.monotonic()
+        try:
+            html_content, response_headers = await get_executor().execute(urlparse(url).netloc, send_request,
+                                                                           max_attempts=2)
+        except CircuitOpenError:
+            # Nothing was sent, so there is nothing to learn about the site
+            raise
+        except Exception as e:
+            await record_fetch(url, False,
+                               permanent=getattr(e, "status_code", None) in PERMANENT_FAILURE_STATUSES)
+            raise
+        fetch_latency = time.monotonic() - fetch_start
+    
+    if html_content is None:
+        logger.debug(f"Page not modified since last fetch: {url}")
+        cache.count("revalidated")
+        cached_page["validated_at"] = time.time()
+        await asyncio.to_thread(cache.set, key, cached_page)
+        return cached_page["text"]
+    
+    logger.debug(f"Successfully fetched URL: {url}")
+    
+    full_text = await extract_text(html_content, max_content_length=None)
+    logger.debug(f"Extracted text content: {len(full_text)} characters")
+    
+    # Pages without text (e.g. rendered by scripts or behind a login wall) count against their site
+    await record_fetch(url, bool(full_text), fetch_latency, len(full_text), permanent=not full_text)
+    
+    if cache is not None and full_text:
+        await asyncio.to_thread(cache.set, key, {
+            "text": full_text,
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "validated_at": time.time()
+        })
+    return full_text
 
-async def fetch_and_analyze_sources(multi_results, anthropic_client, model_name):
+def configure_extraction_pool(workers, max_queued=None):
+    """
+    Start the worker processes used to extract text from fetched pages.
+    
+    Parameters:
+    - workers: Number of worker processes (0 extracts inline on the event loop)
+    - max_queued: Maximum pages queued for or being extracted at once (default: 4 per worker)
+    """
+    global _extraction_pool, _extraction_slots
+    shutdown_extraction_pool()
+    if workers > 0:
+        # Workers start on demand mid-run, when worker threads may hold sqlite or logging locks, so
+        # they come from a clean fork server rather than forking this process (or are spawned where
+        # there is no fork server, e.g. on Windows)
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _extraction_pool = ProcessPoolExecutor(max_workers=workers,
+                                               mp_context=multiprocessing.get_context(start_method))
+        _extraction_slots = asyncio.Semaphore(max_queued or workers * 4)
+        logger.info(f"HTML extraction pool: {workers} worker processes")
+
+def shutdown_extraction_pool():
+    """Stop the extraction worker processes, if any."""
+    global _extraction_pool, _extraction_slots
+    if _extraction_pool is not None:
+        _extraction_pool.shutdown(wait=False, cancel_futures=True)
+    _extraction_pool = None
+    _extraction_slots = None
+
+async def extract_text(html_content, max_content_length=MAX_CONTENT_LENGTH):
+    """
+    Extract compact text from an HTML page without blocking the event loop.
+    
+    Extraction runs in the worker pool when one is configured; callers wait for a free
+    slot once the pool's queue is full, so a burst of fetched pages can't pile up.
+    
+    Parameters:
+    - html_content: Raw HTML
+    - max_content_length: Characters of text to keep (None to keep the full text)
+    
+    Returns:
+    - Extracted and truncated text
+    """
+    if _extraction_pool is None:
+        return extract_text_from_html(html_content, max_content_length)
+    
+    async with _extraction_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_extraction_pool, extract_text_from_html, html_content,
+                                          max_content_length)
+
+def extract_text_from_html(html_content, max_content_length=MAX_CONTENT_LENGTH):
+    """
+    Strip an HTML page down to its text, truncated to max_content_length characters.
+    
+    CPU-bound; runs in an extraction worker process when a pool is configured.
+    
+    Parameters:
+    - html_content: Raw HTML
+    - max_content_length: Characters of text to keep (None to keep the full text)
+    
+    Returns:
+    - Extracted and processed content
+    """
+    # Simple HTML content extraction
+    # In a production system, use a proper HTML parsing library like BeautifulSoup
+    # or a readability library like newspaper3k or trafilatura
+    
+    # Remove script and style tags and their contents
+    html_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL)
+    html_content = re.sub(r'<style[^>]*>.*?</style>', '', html_content, flags=re.DOTALL)
+    
+    # Remove all HTML tags
+    text_content = re.sub(r'<[^>]*>', ' ', html_content)
+    
+    # Replace multiple whitespace with single space
+    text_content = re.sub(r'\s+', ' ', text_content).strip()
+    
+    return truncate_content(text_content, max_content_length)
+
+def truncate_content(text_content, max_content_length=MAX_CONTENT_LENGTH):
+    """
+    Truncate extracted text to max_content_length characters, keeping its beginning and end.
+    
+    Parameters:
+    - text_content: Extracted text
+    - max_content_length: Characters of text to keep (None to keep the full text)
+    
+    Returns:
+    - Truncated text
+    """
+    content_length = len(text_content)
+    
+    # Truncate content if too long, prioritizing beginning and end
+    if max_content_length is not None and content_length > max_content_length:
+        # Keep first 60% and last 40% of max length
+        first_part_length = int(max_content_length * 0.6)
+        last_part_length = max_content_length - first_part_length
+        first_part = text_content[:first_part_length]
+        last_part = text_content[-last_part_length:]
+        text_content = first_part + "\n...[content truncated]...\n" + last_part
+    
+    return text_content
+
+async def fetch_and_analyze_sources(multi_results, anthropic_client, model_name, http_session=None, deadline=None):
     """
     Fetch and analyze sources from multiple search queries.
     
+    All query types are processed concurrently: every URL is fetched in parallel, and each
+    query type's summary starts as soon as its own sources have arrived rather than waiting
+    for the other query types.
+    
     Parameters:
     - multi_results: Dictionary of search results by query type
-    - anthropic_client: Initialized Anthropic client
+    - anthropic_client: Initialized AsyncAnthropic client
     - model_name: Claude model to use
+    - http_session: Shared aiohttp session (a temporary one is used per request if None)
+    - deadline: time.monotonic() deadline; query types not summarized by then are cancelled
     
     Returns:
-    - Dictionary of analysis results by query type
+    - Dictionary of analysis results by query type (only those that finished in time)
     """
-    analysis_results = {}
+    query_types = list(multi_results.keys())
     
-    # Process each query type
-    for query_type, data in multi_results.items():
-        query = data["query"]
-        results = data["results"]
-        
-        if not results:
-            logger.warning(f"No results for query type: {query_type}")
-            analysis_results[query_type] = {
-                "summary": f"No data found for {query_type}.",
-                "sources": []
-            }
+    # Near-duplicate sources are collapsed across all of the game's query types; an article found by
+    # several of them goes to the first in query-type order, so the same sources are kept in every run
+    duplicate_filter = DuplicateFilter(owners=query_types)
+    
+    async def analyze_query(query_type):
+        try:
+            return await _fetch_and_analyze_query(query_type, multi_results[query_type], anthropic_client,
+                                                  model_name, http_session, duplicate_filter)
+        finally:
+            # A query type that fails or is cancelled mustn't hold up the ones after it
+            duplicate_filter.finish(query_type)
+    
+    # Process each query type concurrently
+    analyses = await gather_until_deadline([analyze_query(query_type) for query_type in query_types], deadline)
+    
+    analysis_results = {}
+    for query_type, analysis in zip(query_types, analyses):
+        if analysis is None:
+            logger.warning(f"No analysis for {query_type} (deadline reached or failed)")
             continue
-        
-        # Fetch content for each result
-        sources = []
-        for result in results:
-            url = result.get('url')
-            if url:
+        analysis_results[query_type] = analysis
+    
+    return analysis_results
+
+async def _fetch_and_analyze_query(query_type, data, anthropic_client, model_name, http_session=None,
+                                   duplicate_filter=None):
+    """
+    Fetch all sources for one query type in parallel, then summarize them.
+    
+    Parameters:
+    - query_type: Type of query (matchup, team analysis, etc.)
+    - data: Dictionary with the search query and its results
+    - anthropic_client: Initialized AsyncAnthropic client
+    - model_name: Claude model to use
+    - http_session: Shared aiohttp session (a temporary one is used per request if None)
+    - duplicate_filter: DuplicateFilter shared with the game's other query types, which owns
+      them in query-type order (None to only drop near-duplicates within this query type)
+    
+    Returns:
+    - Dictionary with the summary and source URLs for this query type ("degraded" is True
+      when no sources could be summarized)
+    """
+    duplicate_filter = duplicate_filter or DuplicateFilter()
+    
+    # Team research shared with other games (possibly prefetched)
+    if data.get("team_research") is not None:
+        duplicate_filter.finish(query_type)
+        # A deadline in this game doesn't cancel the research for other games still waiting on it
+        research = await wait_shared(data["team_research"])
+        logger.info(f"Using shared team research for {query_type}")
+        return {
+            "summary": research["summary"],
+            "sources": research["sources"],
+            "degraded": research["degraded"]
+        }
+    
+    query = data["query"]
+    results = [result for result in data["results"] or [] if result.get('url')]
+    
+    # Stages recorded before an interruption (fetched sources, the summary) are picked up on resume
+    analysis_key = make_cache_key("analysis", query_type, query, model_name, SUMMARY_PROMPT_VERSION,
+                                  MAX_CONTENT_LENGTH)
+    sources_key = make_cache_key("sources", query, [result['url'] for result in results], MAX_CONTENT_LENGTH)
+    analysis = await _read_journal(analysis_key)
+    if analysis is not None:
+        logger.debug(f"Using the recorded analysis for {query_type}")
+        # Its sources still count as kept, so later query types drop their copies as before
+        await _register_recorded_sources(duplicate_filter, query_type, await _read_journal(sources_key))
+        return analysis
+    
+    if not results:
+        logger.warning(f"No results for query type: {query_type}")
+        return {
+            "summary": f"No data found for {query_type}.",
+            "sources": [],
+            "degraded": True
+        }
+    
+    sources = await _read_journal(sources_key)
+    if sources is None:
+        sources = await _fetch_ranked_sources(results, http_session, duplicate_filter=duplicate_filter,
+                                              owner=query_type)
+        if sources:
+            await _record_journal(sources_key, sources)
+    else:
+        logger.debug(f"Using {len(sources)} recorded sources for {query_type}")
+        await _register_recorded_sources(duplicate_filter, query_type, sources)
+    
+    # Sources are settled; the next query type can choose its own while this one is summarized
+    duplicate_filter.finish(query_type)
+    
+    # Analyze sources for this query type
+    if sources:
+        summary = await analyze_sources_for_query(query_type, query, sources, anthropic_client, model_name)
+        analysis = {
+            "summary": summary,
+            "sources": [s["url"] for s in sources],
+            "degraded": summary.startswith(SUMMARY_ERROR_PREFIX)
+        }
+        if not analysis["degraded"]:
+            await _record_journal(analysis_key, analysis)
+        return analysis
+    
+    return {
+        "summary": f"Could not retrieve any content for {query_type}.",
+        "sources": [],
+        "degraded": True
+    }
+
+async def _register_recorded_sources(duplicate_filter, owner, sources):
+    """
+    Register sources read back from the stage journal with a game's DuplicateFilter.
+    
+    Parameters:
+    - duplicate_filter: DuplicateFilter shared with the game's other query types
+    - owner: Query type the sources belong to
+    - sources: Recorded source dictionaries (None if none were recorded)
+    """
+    await duplicate_filter.wait_turn(owner)
+    for source in sources or []:
+        duplicate_filter.add(source["url"], source["content"])
+
+async def _fetch_ranked_sources(results, http_session=None, target=SOURCES_PER_QUERY, duplicate_filter=None,
+                                owner=None):
+    """
+    Fetch the best-ranked search results until `target` of them have yielded text.
+    
+    The top `target` results are fetched concurrently; each one that fails, comes back
+    empty or nearly duplicates a source already kept is replaced by the next-ranked result.
+    Sources are kept or dropped in rank order (and after the filter's earlier owners), so
+    the same ones are kept whichever page arrives first.
+    
+    Parameters:
+    - results: Search results for one query
+    - http_session: Shared aiohttp session (a temporary one is used per request if None)
+    - target: Number of useful sources wanted
+    - duplicate_filter: DuplicateFilter holding sources already kept (a new one if None)
+    - owner: This query type's name among the filter's owners (None to check duplicates right away)
+    
+    Returns:
+    - List of source dictionaries with url, title and content, best-ranked first
+    """
+    duplicate_filter = duplicate_filter or DuplicateFilter()
+    candidates = list(enumerate(await rank_sources(results)))
+    next_candidate = 0
+    next_decision = 0
+    pending = {}
+    arrived = {}  # rank -> (result, content, replacing), None for a failed fetch
+    fetched = []
+    
+    def start_next(replacing=False):
+        nonlocal next_candidate
+        if next_candidate < len(candidates):
+            rank, result = candidates[next_candidate]
+            next_candidate += 1
+            pending[asyncio.ensure_future(_source_content(result, http_session))] = (rank, result, replacing)
+    
+    for _ in range(target):
+        start_next()
+    
+    try:
+        # The pages keep downloading while the query types before this one choose their sources
+        await duplicate_filter.wait_turn(owner)
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                rank, result, replacing = pending.pop(task)
                 try:
-                    content = await fetch_content(url)
-                    sources.append({
-                        "url": url,
-                        "title": result.get('title', ''),
-                        "content": content
-                    })
+                    content = task.result()
                 except Exception as e:
-                    logger.error(f"Error fetching content for {url}: {str(e)}")
-        
-        # Analyze sources for this query type
-        if sources:
-            summary = await analyze_sources_for_query(query_type, query, sources, anthropic_client, model_name)
-            analysis_results[query_type] = {
-                "summary": summary,
-                "sources": [s["url"] for s in sources]
-            }
-        else:
-            analysis_results[query_type] = {
-                "summary": f"Could not retrieve any content for {query_type}.",
-                "sources": []
-            }
+                    logger.error(f"Error fetching content for {result['url']}: {str(e)}")
+                    content = None
+                if not content:
+                    if next_candidate < len(candidates):
+                        record_fallback()
+                    start_next(replacing)
+                    arrived[rank] = None
+                    continue
+                arrived[rank] = (result, content, replacing)
+            
+            # Only the best-ranked undecided page can be kept or dropped, so duplicates
+            # within the query resolve the same way in every run
+            while next_decision in arrived:
+                entry = arrived.pop(next_decision)
+                next_decision += 1
+                if entry is None:
+                    continue
+                result, content, replacing = entry
+                url = result['url']
+                if duplicate_filter.check(url, content, replacing=replacing) is not None:
+                    start_next(replacing=True)
+                    continue
+                if replacing:
+                    record_replacement(content)
+                fetched.append({
+                    "url": url,
+                    "title": result.get('title', ''),
+                    "content": content
+                })
+    finally:
+        for task in pending:
+            task.cancel()
     
-    return analysis_results
+    return fetched
+
+async def _source_content(result, http_session=None):
+    """
+    Get a search result's text, truncated to MAX_CONTENT_LENGTH.
+    
+    Results from the local index already carry their full text. Fetched pages are added to
+    the index in full, so BM25 sees the whole article and a later MAX_CONTENT_LENGTH applies.
+    """
+    if result.get("content"):
+        return truncate_content(result["content"], MAX_CONTENT_LENGTH)
+    full_text = await fetch_full_content(result['url'], http_session)
+    await index_article(result['url'], result.get('title', ''), full_text, result.get('publishedDate', ''))
+    return truncate_content(full_text, MAX_CONTENT_LENGTH)
+
+async def _read_journal(key):
+    """
+    Look up a stage output recorded earlier in this run (see cache.configure_stage_journal).
+    
+    Returns:
+    - The recorded output, or None if it wasn't recorded or there is no journal
+    """
+    journal = get_cache("journal")
+    if journal is None:
+        return None
+    return await asyncio.to_thread(journal.get, key)
+
+async def _record_journal(key, value):
+    """Durably record a finished stage output so a resumed run can pick it up."""
+    journal = get_cache("journal")
+    if journal is not None:
+        await asyncio.to_thread(journal.set, key, value)
+
+async def _research_team(team_name, anthropic_client, model_name, http_session=None):
+    """
+    Run the full team-level research pipeline: search, fetch and summarize.
+    
+    Returns:
+    - Dictionary with the query, search results, summary and source URLs
+    """
+    query = team_analysis_query(team_name)
+    results = await search_local_first(query, http_session, (team_name,))
+    analysis = await _fetch_and_analyze_query(f"{team_name}_analysis", {"query": query, "results": results},
+                                              anthropic_client, model_name, http_session)
+    return {
+        "query": query,
+        "results": results,
+        "summary": analysis["summary"],
+        "sources": analysis["sources"],
+        "degraded": analysis["degraded"]
+    }
+
+async def _research_team_speculatively(entry, team_name, anthropic_client, model_name, http_session=None):
+    """Run team research once a prefetch slot is free, marking the entry as started."""
+    async with _prefetch_semaphore:
+        entry["started"] = True
+        logger.debug(f"Prefetching team research for {team_name}")
+        return await _research_team(team_name, anthropic_client, model_name, http_session)
+
+def _log_research_failure(task):
+    """Log failed research tasks (also marks their exception as retrieved)."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Team research failed: {str(task.exception())}")
+
+def _is_reusable(entry):
+    task = entry["task"]
+    return not (task.done() and (task.cancelled() or task.exception() is not None))
+
+def get_team_research(team_name, anthropic_client, model_name, http_session=None):
+    """
+    Get the shared research task for a team, starting it if needed.
+    
+    A finished or in-progress task (including a prefetched one) is reused. A speculative
+    task still waiting for a prefetch slot is replaced by one that starts immediately.
+    Callers wait for it with wait_shared, so research every waiting game gave up on is cancelled.
+    
+    Parameters:
+    - team_name: Name of the team
+    - anthropic_client: Initialized AsyncAnthropic client
+    - model_name: Claude model to use
+    - http_session: Shared aiohttp session
+    
+    Returns:
+    - Shared entry whose "task" resolves to the team research dictionary
+    """
+    key = (team_name, model_name)
+    entry = _team_research.get(key)
+    if entry is not None and _is_reusable(entry):
+        if entry["started"]:
+            return entry
+        # Still queued behind other prefetches: a game needs it now
+        entry["task"].cancel()
+    
+    task = asyncio.ensure_future(_research_team(team_name, anthropic_client, model_name, http_session))
+    task.add_done_callback(_log_research_failure)
+    entry = {"task": task, "started": True, "waiters": 0}
+    _team_research[key] = entry
+    return entry
+
+def configure_prefetch(concurrency):
+    """
+    Enable speculative team research with at most `concurrency` prefetches at a time.
+    
+    Parameters:
+    - concurrency: Maximum concurrent prefetches (0 disables prefetching)
+    """
+    global _prefetch_semaphore, _prefetch_concurrency
+    # Brackets processed together share one limit, so keep it if it is unchanged
+    if concurrency == _prefetch_concurrency and _prefetch_semaphore is not None:
+        return
+    _prefetch_semaphore = asyncio.Semaphore(concurrency) if concurrency > 0 else None
+    _prefetch_concurrency = concurrency
+
+def prefetch_team_research(team_names, anthropic_client, model_name, http_session=None):
+    """
+    Start speculative background research for teams that don't have any yet.
+    
+    Parameters:
+    - team_names: Team names in priority order
+    - anthropic_client: Initialized AsyncAnthropic client
+    - model_name: Claude model to use
+    - http_session: Shared aiohttp session
+    """
+    if _prefetch_semaphore is None:
+        return
+    
+    for team_name in team_names:
+        key = (team_name, model_name)
+        entry = _team_research.get(key)
+        if entry is not None and _is_reusable(entry):
+            continue
+        
+        entry = {"started": False, "waiters": 0}
+        entry["task"] = asyncio.ensure_future(
+            _research_team_speculatively(entry, team_name, anthropic_client, model_name, http_session))
+        entry["task"].add_done_callback(_log_research_failure)
+        _team_research[key] = entry
+
+async def cancel_team_research():
+    """Cancel any team research still running (e.g. prefetches for eliminated teams)."""
+    pending = [entry["task"] for entry in _team_research.values() if not entry["task"].done()]
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.info(f"Cancelled {len(pending)} outstanding team research tasks")
+        await asyncio.gather(*pending, return_exceptions=True)
 
 async def analyze_sources_for_query(query_type, query, sources, anthropic_client, model_name):
     """
@@ -335,12 +1019,43 @@ async def analyze_sources_for_query(query_type, query, sources, anthropic_client
     - query_type: Type of query (matchup, team analysis, etc.)
     - query: The search query used
     - sources: List of source dictionaries with url, title, and content
-    - anthropic_client: Initialized Anthropic client
+    - anthropic_client: Initialized AsyncAnthropic client
     - model_name: Claude model to use
     
     Returns:
     - Summary of the analysis
     """
+    # Summaries are content-addressed, so unchanged sources are summarized once across games and runs.
+    # The query is part of the prompt (and differs between games of the same query type), so it is keyed too
+    source_hashes = sorted(
+        hashlib.sha256(f"{source['url']}\n{source['title']}\n{source['content']}".encode("utf-8")).hexdigest()
+        for source in sources
+    )
+    key = make_cache_key("summary", SUMMARY_PROMPT_VERSION, query_type, query, model_name, source_hashes)
+    return await _coalesce(("summary", key), lambda: _cached_analyze_sources_for_query(
+        key, query_type, query, sources, anthropic_client, model_name))
+
+async def _cached_analyze_sources_for_query(key, query_type, query, sources, anthropic_client, model_name):
+    """Serve a summary from the persistent summary cache, or generate and cache it."""
+    cache = get_cache("summaries")
+    if cache is not None:
+        summary = await asyncio.to_thread(cache.get, key)
+        if summary is not None:
+            logger.debug(f"Summary cache hit for query type: {query_type}")
+            return summary
+    
+    try:
+        summary = await _analyze_sources_for_query(query_type, query, sources, anthropic_client, model_name)
+    except Exception as e:
+        logger.error(f"Error getting analysis from Claude: {str(e)}")
+        return f"{SUMMARY_ERROR_PREFIX}: {str(e)}"
+    
+    if cache is not None:
+        await asyncio.to_thread(cache.set, key, summary)
+    return summary
+
+async def _analyze_sources_for_query(query_type, query, sources, anthropic_client, model_name):
+    """Summarize sources with Claude (see analyze_sources_for_query); raises if the call fails."""
     logger.info(f"Analyzing {len(sources)} sources for query type: {query_type}")
     
     # Prepare system prompt based on query type
@@ -427,22 +1142,22 @@ Your summary should be factual and analytical, avoiding subjective judgments unl
     messages.append(assistant_message)
     messages.append(user_message)
     
-    # Get summary from Claude
-    try:
-        response = anthropic_client.messages.create(
+    # Get summary from Claude through the shared executor
+    response = await get_executor().execute(
+        "anthropic",
+        lambda: anthropic_client.messages.create(
             model=model_name,
             max_tokens=1000,
             messages=messages,
             system=system_prompt
-        )
-        
-        summary = response.content[0].text
-        logger.debug(f"Generated summary for {query_type} ({len(summary)} chars)")
-        return summary
-        
-    except Exception as e:
-        logger.error(f"Error getting analysis from Claude: {str(e)}")
-        return f"Error analyzing sources: {str(e)}"
+        ),
+        governor=get_governor("anthropic"),
+        tokens=estimate_messages_token_count(messages, system_prompt)
+    )
+    
+    summary = response.content[0].text
+    logger.debug(f"Generated summary for {query_type} ({len(summary)} chars)")
+    return summary
 
 async def fetch_team_stats(team_name):
     """
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Game Queue Module
+----------------
+Lease-based queue of games shared by a coordinator and worker processes.
+
+The queue is a SQLite database, so workers on the same machine or on machines
+sharing a filesystem can claim games from it. A claimed game is leased to one
+worker for a limited time; the worker renews the lease with heartbeats while it
+predicts, and the coordinator re-issues games whose lease expired (e.g. because
+the worker crashed).
+"""
+
+import time
+import json
+import sqlite3
+import logging
+from contextlib import contextmanager
+from utils import parse_game_id
+
+# Set up logger
+logger = logging.getLogger('game_queue')
+
+# How long a claimed game stays leased without a heartbeat
+DEFAULT_LEASE_SECONDS = 120
+
+# Attempts per game before it is reported as failed to the coordinator
+MAX_GAME_ATTEMPTS = 3
+
+# How often the coordinator and idle workers poll the queue
+POLL_INTERVAL_SECONDS = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id TEXT PRIMARY KEY,
+    round_number INTEGER NOT NULL,
+    game_number INTEGER NOT NULL,
+    game_json TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker_id TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result_json TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+class GameFailedError(Exception):
+    """Raised to the coordinator when workers could not predict a game."""
+
+class GameQueue:
+    """
+    SQLite-backed game queue.
+    
+    Game statuses: pending -> leased -> done, or back to pending when a lease expires
+    or a worker reports an error (failed after MAX_GAME_ATTEMPTS attempts).
+    
+    Parameters:
+    - path: Path to the SQLite database file (created if missing)
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+    
+    @contextmanager
+    def _connect(self):
+        # A connection per operation keeps the queue safe to use from worker threads
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def start(self, bracket_key, resume=False):
+        """
+        Open the queue for a coordinator run.
+        
+        A coordinator resuming the same bracket (from a checkpoint) keeps the results already
+        in the queue, and games that failed are given another round of attempts. Otherwise
+        the queue is cleared, so a fresh run never reuses results predicted with other
+        worker settings.
+        
+        Parameters:
+        - bracket_key: Identifies the bracket being predicted
+        - resume: True if the coordinator is resuming this bracket from a checkpoint
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'bracket'").fetchone()
+            if row is not None and row[0] != bracket_key:
+                logger.info("Queue was used for a different bracket; clearing it")
+                conn.execute("DELETE FROM games")
+            elif not resume:
+                cleared = conn.execute("DELETE FROM games").rowcount
+                if cleared:
+                    logger.info(f"Starting a new run; cleared {cleared} games left in the queue")
+            else:
+                retried = conn.execute(
+                    "UPDATE games SET status = 'pending', attempts = 0, error = NULL WHERE status = 'failed'"
+                ).rowcount
+                if retried:
+                    logger.info(f"Retrying {retried} games that failed before the coordinator restarted")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('bracket', ?)", (bracket_key,))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('closed', '0')")
+    
+    def close_queue(self):
+        """Tell workers that no more games will be submitted."""
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('closed', '1')")
+    
+    def is_closed(self):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'closed'").fetchone()
+            return row is not None and row[0] == "1"
+    
+    def submit(self, game):
+        """Add a game to the queue (no-op if it is already queued or done)."""
+        round_number, game_number = parse_game_id(game["game_id"])
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO games (game_id, round_number, game_number, game_json) VALUES (?, ?, ?, ?)",
+                (game["game_id"], round_number, game_number, json.dumps(game))
+            )
+    
+    def claim(self, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Lease the next pending game (earliest round first).
+        
+        Returns:
+        - Game dictionary, or None if no game is pending
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT game_id, game_json FROM games WHERE status = 'pending' "
+                "ORDER BY round_number, game_number LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE games SET status = 'leased', worker_id = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE game_id = ?",
+                (worker_id, time.time() + lease_seconds, row[0])
+            )
+            return json.loads(row[1])
+    
+    def heartbeat(self, game_id, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Extend a worker's lease on a game.
+        
+        Returns:
+        - False if the worker no longer holds the lease
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE games SET lease_expires = ? WHERE game_id = ? AND worker_id = ? AND status = 'leased'",
+                (time.time() + lease_seconds, game_id, worker_id)
+            )
+            return cursor.rowcount == 1
+    
+    def complete(self, game_id, worker_id, prediction):
+        """
+        Store a worker's prediction for a game.
+        
+        The first result wins: a worker whose lease expired may still finish, and its result
+        is accepted unless another worker already completed the game.
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE games SET status = 'done', worker_id = ?, result_json = ?, lease_expires = NULL "
+                "WHERE game_id = ? AND status != 'done'",
+                (worker_id, json.dumps(prediction), game_id)
+            )
+            return cursor.rowcount == 1
+    
+    def fail(self, game_id, worker_id, error):
+        """Return a game the worker could not predict to the queue, or mark it failed."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE games SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker_id = NULL, lease_expires = NULL, error = ? "
+                "WHERE game_id = ? AND worker_id = ? AND status = 'leased'",
+                (MAX_GAME_ATTEMPTS, str(error), game_id, worker_id)
+            )
+    
+    def requeue_expired(self):
+        """
+        Re-issue games whose lease expired without a heartbeat.
+        
+        Returns:
+        - List of (game_id, worker_id) pairs that were re-issued
+        """
+        with self._transaction() as conn:
+            expired = conn.execute(
+                "SELECT game_id, worker_id FROM games WHERE status = 'leased' AND lease_expires < ?",
+                (time.time(),)
+            ).fetchall()
+            for game_id, _ in expired:
+                conn.execute(
+                    "UPDATE games SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                    "worker_id = NULL, lease_expires = NULL, error = 'lease expired' WHERE game_id = ?",
+                    (MAX_GAME_ATTEMPTS, game_id)
+                )
+            return expired
+    
+    def get_result(self, game_id):
+        """
+        Get the outcome of a submitted game.
+        
+        Returns:
+        - Prediction dictionary once done, None while pending or leased (raises
+          GameFailedError if every attempt failed)
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT status, result_json, error FROM games WHERE game_id = ?",
+                               (game_id,)).fetchone()
+        if row is None or row[0] in ("pending", "leased"):
+            return None
+        if row[0] == "failed":
+            raise GameFailedError(f"Game {game_id} failed after {MAX_GAME_ATTEMPTS} attempts: {row[2]}")
+        return json.loads(row[1])
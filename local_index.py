@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Local Index Module
+-----------------
+Full-text index over every article fetched, used to answer searches without Exa.
+
+Each page fetched for a search result is added to an on-disk SQLite FTS5 index. Before
+a query goes to Exa, the index is searched with BM25 ranking; if enough indexed
+articles cover the query's terms, they are used as the search results (with their text,
+so they don't have to be fetched again). By the later rounds most queries are about
+teams whose articles were already fetched, so few searches and fetches reach the network.
+"""
+
+import re
+import math
+import time
+import sqlite3
+import asyncio
+import logging
+from contextlib import contextmanager
+
+# Set up logger
+logger = logging.getLogger('local_index')
+
+# Default age after which indexed articles are no longer used (override with configure_local_index)
+DEFAULT_MAX_AGE_SECONDS = 24 * 60 * 60
+
+# Share of a query's terms an article must contain to count as a local match, with terms weighted by
+# how rare they are in the index (so an article matching only generic words like "basketball" doesn't count).
+# Numbers (seeds, years) and the caller's required terms (team names) must match regardless
+MIN_TERM_COVERAGE = 0.8
+
+# BM25 candidates checked for term coverage per query
+CANDIDATES_PER_QUERY = 20
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS articles USING fts5(
+    url UNINDEXED,
+    title,
+    content,
+    published UNINDEXED,
+    added_at UNINDEXED
+);
+"""
+
+# Global run-scoped index; None when local search is disabled
+_index = None
+_index_stats = {"local_hits": 0, "local_misses": 0, "indexed": 0}
+
+# URLs indexed during this run, so pages fetched again for other games aren't rewritten
+_indexed_urls = set()
+
+def query_terms(text):
+    """
+    Split text into the lowercase terms used for indexing and matching.
+    
+    Single letters are dropped, but single digits are kept: a "#1 seed" query is not a "#8 seed" one.
+    
+    Returns:
+    - Set of terms
+    """
+    return {term for term in re.findall(r"\w+", text.lower()) if len(term) > 1 or term.isdigit()}
+
+class ArticleIndex:
+    """
+    SQLite FTS5 index of fetched articles with BM25 ranking.
+    
+    Parameters:
+    - path: Path to the SQLite file (created if missing)
+    - max_age_seconds: Articles indexed longer ago than this are ignored and pruned
+    """
+    
+    def __init__(self, path, max_age_seconds=DEFAULT_MAX_AGE_SECONDS):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            pruned = conn.execute("DELETE FROM articles WHERE added_at < ?",
+                                  (time.time() - max_age_seconds,)).rowcount
+        if pruned:
+            logger.info(f"Pruned {pruned} articles older than {max_age_seconds / 3600:.0f}h from the local index")
+    
+    @contextmanager
+    def _connect(self):
+        # A connection per operation keeps the index safe to use from worker threads
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def add(self, url, title, content, published=""):
+        """Add an article, replacing any earlier copy of the same URL."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM articles WHERE url = ?", (url,))
+                conn.execute("INSERT INTO articles (url, title, content, published, added_at) VALUES (?, ?, ?, ?, ?)",
+                             (url, title, content, published, time.time()))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def search(self, query, limit, required=()):
+        """
+        Find indexed articles that cover most of a query's terms, including all of its numbers.
+        
+        Parameters:
+        - query: Search query string
+        - limit: Maximum number of articles to return
+        - required: Phrases (e.g. team names) whose terms every article must contain
+        
+        Returns:
+        - List of results (url, title, publishedDate, content), best BM25 match first
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        required_terms = {term for term in terms if term.isdigit()} | query_terms(" ".join(required))
+        
+        # Quoted terms match literally, so query text can't be read as FTS5 syntax
+        match = " OR ".join(f'"{term}"' for term in sorted(terms))
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT url, title, content, published FROM articles "
+                "WHERE articles MATCH ? AND added_at >= ? ORDER BY bm25(articles) LIMIT ?",
+                (match, time.time() - self.max_age_seconds, CANDIDATES_PER_QUERY)
+            ).fetchall()
+            if not rows:
+                return []
+            total = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            # Same inverse document frequency as BM25: terms found in few articles weigh the most
+            weights = {}
+            for term in terms:
+                found = conn.execute("SELECT COUNT(*) FROM articles WHERE articles MATCH ?",
+                                     (f'"{term}"',)).fetchone()[0]
+                weights[term] = math.log((total - found + 0.5) / (found + 0.5) + 1)
+        
+        results = []
+        for url, title, content, published in rows:
+            article_terms = query_terms(f"{title} {content}")
+            if not required_terms <= article_terms:
+                continue
+            matched = terms & article_terms
+            coverage = sum(weights[term] for term in matched) / sum(weights.values())
+            if coverage >= MIN_TERM_COVERAGE:
+                results.append({"url": url, "title": title, "publishedDate": published, "content": content})
+            if len(results) >= limit:
+                break
+        return results
+
+def configure_local_index(path, max_age_seconds=DEFAULT_MAX_AGE_SECONDS):
+    """
+    Open the local article index for this run.
+    
+    Parameters:
+    - path: Path to the index's SQLite file (None disables local search)
+    - max_age_seconds: How long indexed articles are used to answer queries
+    """
+    global _index
+    _indexed_urls.clear()
+    _index = ArticleIndex(path, max_age_seconds) if path else None
+    if _index is not None:
+        logger.info(f"Local article index in {path}")
+
+async def index_article(url, title, content, published=""):
+    """Add a fetched article to the local index (no-op if local search is disabled)."""
+    if _index is None or not content or url in _indexed_urls:
+        return
+    _indexed_urls.add(url)
+    await asyncio.to_thread(_index.add, url, title, content, published)
+    _index_stats["indexed"] += 1
+
+async def search_local(query, min_results, required=()):
+    """
+    Answer a query from the local index if enough indexed articles match it.
+    
+    Parameters:
+    - query: Search query string
+    - min_results: Matching articles needed to skip the network search
+    - required: Phrases (e.g. team names) whose terms every matching article must contain
+    
+    Returns:
+    - List of results including their text, or None if local recall is too low
+    """
+    if _index is None:
+        return None
+    # Extra matches give the caller something to fall back on if a result is skipped
+    results = await asyncio.to_thread(_index.search, query, min_results * 2, required)
+    if len(results) < min_results:
+        _index_stats["local_misses"] += 1
+        return None
+    _index_stats["local_hits"] += 1
+    logger.debug(f"Answered query from the local index: {query[:50]}...")
+    return results
+
+def log_local_index_stats():
+    """Log how many queries the local index answered."""
+    if _index is None:
+        return
+    lookups = _index_stats["local_hits"] + _index_stats["local_misses"]
+    logger.info(f"Local index: {_index_stats['local_hits']} of {lookups} queries answered without Exa, "
+                f"{_index_stats['indexed']} articles indexed")
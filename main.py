@@ -14,9 +14,22 @@ import sys
 from datetime import datetime
 from dotenv import load_dotenv
 
-from bracket_manager import process_bracket
-from reporting import generate_report, generate_html_bracket
-from anthropic import Anthropic
+from bracket_manager import process_bracket, run_worker
+from claude_integration import cancel_matchup_research
+from data_fetcher import (create_http_session, log_coalescing_stats, configure_extraction_pool,
+                          shutdown_extraction_pool, cancel_team_research)
+from request_executor import configure_executor, log_executor_stats
+from utils import parse_duration
+from game_queue import DEFAULT_LEASE_SECONDS
+from cache import (configure_caches, configure_stage_journal, log_cache_stats, DEFAULT_SEARCH_MAX_BYTES,
+                   DEFAULT_PAGE_MAX_BYTES, DEFAULT_SUMMARY_MAX_BYTES, DEFAULT_PREDICTION_MAX_BYTES)
+from source_ranking import log_source_stats
+from source_dedup import log_dedup_stats
+from local_index import configure_local_index, log_local_index_stats
+from rate_limiter import (configure_rate_limits, log_rate_limit_stats, DEFAULT_CLAUDE_REQUESTS_PER_MINUTE,
+                          DEFAULT_CLAUDE_INPUT_TOKENS_PER_MINUTE, DEFAULT_EXA_REQUESTS_PER_SECOND)
+from reporting import generate_report, generate_html_bracket, generate_disagreement_report
+from anthropic import AsyncAnthropic
 
 # Configure logging
 def setup_logging(debug_level, log_dir):
@@ -49,10 +62,22 @@ async def main():
     """Main execution function."""
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="March Madness Bracket Predictor")
-    parser.add_argument("--bracket", required=True, help="Path to initial bracket JSON file")
+    parser.add_argument("mode", nargs="?", choices=["run", "worker"], default="run",
+                        help="run: predict a bracket (default); worker: predict games from a coordinator's --queue")
+    parser.add_argument("--bracket", nargs="+",
+                        help="Path to initial bracket JSON file (required unless running as a worker). Several "
+                             "brackets are predicted concurrently, sharing research, connections and rate limits")
+    parser.add_argument("--batch",
+                        help="JSON file listing brackets to predict concurrently, each with optional settings "
+                             "(name, model, simple_analysis, scheduler, max_concurrent_games, game_deadline, "
+                             "speculation_budget)")
     parser.add_argument("--output", required=True, help="Directory to save results")
     parser.add_argument("--checkpoint", help="Path to checkpoint file to resume from")
     parser.add_argument("--model", help="Claude model to use")
+    parser.add_argument("--models", type=lambda value: [model.strip() for model in value.split(",") if model.strip()],
+                        help="Comma-separated Claude models to compare. Research is done once per game (summarized "
+                             "by the first model), each model predicts its own bracket, and a disagreement report "
+                             "is written")
     parser.add_argument("--debug", "-d", action="count", default=0, 
                         help="Debug level (use multiple times for higher levels: -d, -dd)")
     parser.add_argument("--test", action="store_true", 
@@ -62,7 +87,74 @@ async def main():
     parser.add_argument("--run-name", help="Custom name for this run")
     parser.add_argument("--simple-analysis", action="store_true",
                         help="Use simple analysis instead of enhanced multi-query approach")
+    parser.add_argument("--max-concurrent-games", type=int, default=1,
+                        help="Maximum number of games to predict concurrently (default: 1)")
+    parser.add_argument("--scheduler", choices=["rounds", "dag"], default="rounds",
+                        help="Schedule games round by round, or as soon as their feeder games finish (dag)")
+    parser.add_argument("--claude-rpm", type=int, default=DEFAULT_CLAUDE_REQUESTS_PER_MINUTE,
+                        help=f"Claude requests per minute limit (default: {DEFAULT_CLAUDE_REQUESTS_PER_MINUTE})")
+    parser.add_argument("--claude-itpm", type=int, default=DEFAULT_CLAUDE_INPUT_TOKENS_PER_MINUTE,
+                        help=f"Claude input tokens per minute limit (default: {DEFAULT_CLAUDE_INPUT_TOKENS_PER_MINUTE})")
+    parser.add_argument("--exa-rps", type=int, default=DEFAULT_EXA_REQUESTS_PER_SECOND,
+                        help=f"Exa search requests per second limit (default: {DEFAULT_EXA_REQUESTS_PER_SECOND})")
+    parser.add_argument("--game-deadline", type=parse_duration,
+                        help="Wall-clock budget per game, e.g. 60s or 2m (research still running is cancelled)")
+    parser.add_argument("--prefetch-concurrency", type=int, default=2,
+                        help="Teams whose research may be prefetched in the background at once (0 disables, default: 2)")
+    parser.add_argument("--extraction-workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Worker processes for extracting text from fetched pages "
+                             "(0 extracts on the main event loop, default: up to 4)")
+    parser.add_argument("--speculation-budget", type=int, default=0,
+                        help="Speculatively predict candidate Elite Eight to Championship matchups before their "
+                             "feeder games finish, starting at most this many predictions (default: 0, disabled)")
+    parser.add_argument("--cache-dir",
+                        help="Directory for caches kept across runs, so reruns and resumes skip repeated work "
+                             "(default: .cache in the output directory)")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the persistent caches")
+    parser.add_argument("--search-cache-ttl", type=parse_duration, default="6h",
+                        help="How long cached Exa search results stay valid, e.g. 30m or 6h (default: 6h)")
+    parser.add_argument("--search-cache-max-mb", type=float, default=DEFAULT_SEARCH_MAX_BYTES / (1024 * 1024),
+                        help=f"Size cap for the search cache in MB; least recently used results are evicted "
+                             f"(default: {DEFAULT_SEARCH_MAX_BYTES // (1024 * 1024)})")
+    parser.add_argument("--page-cache-ttl", type=parse_duration, default="168h",
+                        help="How long extracted page text is kept; pages older than an hour are revalidated "
+                             "with a conditional request (default: 168h)")
+    parser.add_argument("--page-cache-max-mb", type=float, default=DEFAULT_PAGE_MAX_BYTES / (1024 * 1024),
+                        help=f"Size cap for the compressed page cache in MB; least recently used pages are evicted "
+                             f"(default: {DEFAULT_PAGE_MAX_BYTES // (1024 * 1024)})")
+    parser.add_argument("--summary-cache-max-mb", type=float, default=DEFAULT_SUMMARY_MAX_BYTES / (1024 * 1024),
+                        help=f"Size cap for the source summary cache in MB; least recently used summaries are "
+                             f"evicted (default: {DEFAULT_SUMMARY_MAX_BYTES // (1024 * 1024)})")
+    parser.add_argument("--prediction-cache-ttl", type=parse_duration, default="24h",
+                        help="How long cached game predictions are reused by later runs (default: 24h)")
+    parser.add_argument("--prediction-cache-max-mb", type=float, default=DEFAULT_PREDICTION_MAX_BYTES / (1024 * 1024),
+                        help=f"Size cap for the prediction cache in MB "
+                             f"(default: {DEFAULT_PREDICTION_MAX_BYTES // (1024 * 1024)})")
+    parser.add_argument("--negative-cache-ttl", type=parse_duration, default="24h",
+                        help="How long URLs that failed to yield text (blocked, paywalled or empty pages) are "
+                             "skipped in favor of the next search result (default: 24h)")
+    parser.add_argument("--local-index-max-age", type=parse_duration, default="24h",
+                        help="How long fetched articles stay in the local index used to answer searches without "
+                             "Exa (default: 24h)")
+    parser.add_argument("--no-local-index", action="store_true",
+                        help="Send every search to Exa instead of answering from previously fetched articles")
+    parser.add_argument("--refresh-predictions", action="store_true",
+                        help="Ask Claude again for every game and overwrite the cached predictions")
+    parser.add_argument("--clear-prediction-cache", action="store_true",
+                        help="Remove all cached predictions before the run")
+    parser.add_argument("--queue",
+                        help="Game queue (SQLite file on a shared filesystem). With run, coordinate the bracket and "
+                             "let workers predict the games; with worker, claim games from this queue")
+    parser.add_argument("--lease-seconds", type=int, default=DEFAULT_LEASE_SECONDS,
+                        help=f"How long a worker's claim on a game lasts without a heartbeat (default: {DEFAULT_LEASE_SECONDS})")
+    parser.add_argument("--worker-id", help="Name of this worker in the game queue (default: host name and process id)")
     args = parser.parse_args()
+    if args.mode == "worker" and not args.queue:
+        parser.error("worker mode requires --queue")
+    if args.mode == "run" and not args.bracket and not args.checkpoint and not args.batch:
+        parser.error("--bracket is required")
+    if args.checkpoint and args.bracket and len(args.bracket) > 1:
+        parser.error("--checkpoint can only be used with a single bracket")
     
     # Create a run-specific subfolder in the output directory
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -92,6 +184,16 @@ async def main():
     else:
         print("Mode: FULL RUN")
     print(f"Analysis: {analysis_mode}")
+    if args.max_concurrent_games > 1:
+        print(f"Concurrency: up to {args.max_concurrent_games} games at a time")
+    if args.game_deadline:
+        print(f"Game deadline: {args.game_deadline:.0f}s per game")
+    if args.scheduler == "dag":
+        print("Scheduler: DAG (games start as soon as their feeder games finish)")
+    if args.mode == "worker":
+        print(f"Role: WORKER (claiming games from {args.queue})")
+    elif args.queue:
+        print(f"Role: COORDINATOR (games predicted by workers through {args.queue})")
     print(f"========================================================\n")
     
     # Load environment variables
@@ -108,9 +210,11 @@ async def main():
     
     # Set model from args or environment
     model = args.model or os.environ.get("CLAUDE_MODEL", "claude-3-5-sonnet-20241022")
+    if args.models:
+        model = args.models[0]
     logger.info(f"Using Claude model: {model}")
     
-    # Initialize Anthropic client
+    # Initialize async Anthropic client so Claude calls don't block the event loop
     try:
         anthropic_api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not anthropic_api_key:
@@ -118,57 +222,83 @@ async def main():
             print("Error: Missing ANTHROPIC_API_KEY environment variable")
             return
             
-        anthropic_client = Anthropic(api_key=anthropic_api_key)
+        # SDK retries are disabled so the request executor is the only retry path (retry budget,
+        # circuit breaker and rate limiter all see every failed attempt)
+        anthropic_client = AsyncAnthropic(api_key=anthropic_api_key, max_retries=0)
         logger.debug("Anthropic client initialized with API key: [MASKED]")
     except Exception as e:
         logger.error(f"Failed to initialize Anthropic client: {str(e)}")
         print(f"Error: Failed to initialize Anthropic client: {str(e)}")
         return
     
-    # Verify bracket file exists
-    bracket_path = args.checkpoint if args.checkpoint else args.bracket
-    if not os.path.exists(bracket_path):
-        logger.error(f"Bracket file not found: {bracket_path}")
-        print(f"Error: Bracket file not found: {bracket_path}")
+    # Workers take their games from the coordinator's queue instead of a bracket file
+    if args.mode == "worker":
+        await run_worker_mode(args, anthropic_client, model, use_enhanced_analysis, logger)
         return
     
-    # Copy the input bracket to the run directory for reference
+    # Brackets to predict in this run, each with its own settings
     try:
-        with open(bracket_path, 'r') as src:
-            input_bracket = json.load(src)
-            input_bracket_path = os.path.join(run_dir, "input_bracket.json")
-            with open(input_bracket_path, 'w') as dest:
-                json.dump(input_bracket, dest, indent=2)
-        logger.debug(f"Copied input bracket to {input_bracket_path}")
+        jobs = build_bracket_jobs(args, model)
     except Exception as e:
-        logger.warning(f"Could not copy input bracket: {str(e)}")
+        logger.error(f"Could not read batch file: {str(e)}")
+        print(f"Error: Could not read batch file: {str(e)}")
+        return
+    if args.queue and len(jobs) > 1:
+        print("Error: --queue coordinates a single bracket")
+        return
+    
+    # Verify bracket files exist
+    for job in jobs:
+        if not os.path.exists(job["bracket"]):
+            logger.error(f"Bracket file not found: {job['bracket']}")
+            print(f"Error: Bracket file not found: {job['bracket']}")
+            return
+    
+    # Shared admission control for Claude and Exa across all concurrent games
+    configure_rate_limits(args.claude_rpm, args.claude_itpm, args.exa_rps)
+    configure_executor()
+    configure_run_caches(args)
     
-    # Process the bracket
+    # Resuming picks up games that were interrupted mid-research. The journal lives in the run
+    # directory, so a resumed run uses the one next to its checkpoint (resolved, as it may be under "latest")
+    journal_dir = os.path.dirname(os.path.realpath(args.checkpoint)) if args.checkpoint else run_dir
+    configure_stage_journal(os.path.join(journal_dir, "stage_journal.sqlite"))
+    
+    # One pooled HTTP session for every Exa search and page fetch in this run
+    http_session = create_http_session()
+    
+    # Page text extraction is CPU-bound, so it runs in worker processes off the event loop
+    configure_extraction_pool(args.extraction_workers if not args.dry_run else 0)
+    
+    # Process the brackets
     try:
-        logger.info(f"Processing bracket from: {bracket_path}")
-        
-        final_path = await process_bracket(
-            bracket_path, 
-            run_dir,  # Use run-specific directory
-            anthropic_client, 
-            model,
-            test_mode=args.test,
-            dry_run=args.dry_run,
-            debug_level=args.debug,
-            use_enhanced_analysis=use_enhanced_analysis
-        )
-        
-        logger.info(f"Bracket processing complete")
-        print(f"\nBracket prediction complete! Final bracket saved to: {final_path}")
-        
-        # Generate reports
-        logger.info("Generating reports")
-        report_path = generate_report(final_path, run_dir)
-        html_path = generate_html_bracket(final_path, run_dir)
-        
-        # Print final paths
-        print(f"Report generated at: {report_path}")
-        print(f"HTML visualization at: {html_path}")
+        if len(jobs) == 1:
+            await run_bracket_job(jobs[0], run_dir, args, anthropic_client, http_session, logger)
+        else:
+            # Brackets run side by side under the same rate limits, sharing team research
+            print(f"Predicting {len(jobs)} brackets concurrently: {', '.join(job['name'] for job in jobs)}")
+            results = await asyncio.gather(
+                *(run_bracket_job(job, os.path.join(run_dir, job["name"]), args, anthropic_client, http_session,
+                                  logger, shared_research=True) for job in jobs),
+                return_exceptions=True
+            )
+            await cancel_team_research()
+            await cancel_matchup_research()
+            
+            for job, result in zip(jobs, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error processing bracket {job['name']}: {str(result)}", exc_info=result)
+                    print(f"Error in bracket {job['name']}: {str(result)}. See log file for details.")
+            
+            # Compare the brackets each model predicted for the same input bracket
+            groups = {}
+            for job, result in zip(jobs, results):
+                if job.get("group") and not isinstance(result, Exception):
+                    groups.setdefault(job["group"], {})[job["model"]] = result
+            for group, final_paths in groups.items():
+                if len(final_paths) > 1:
+                    disagreement_path = generate_disagreement_report(final_paths, os.path.join(run_dir, group))
+                    print(f"Model disagreement report: {disagreement_path}")
         
         # Create a symlink to the latest run in the parent directory
         latest_link = os.path.join(args.output, "latest")
@@ -186,6 +316,198 @@ async def main():
     except Exception as e:
         logger.error(f"Error processing bracket: {str(e)}", exc_info=True)
         print(f"Error: {str(e)}. See log file for details.")
+    finally:
+        log_rate_limit_stats()
+        log_executor_stats()
+        log_coalescing_stats()
+        log_source_stats()
+        log_dedup_stats()
+        log_local_index_stats()
+        log_cache_stats()
+        
+        # Release the HTTP and Claude connection pools and the extraction workers
+        await http_session.close()
+        await anthropic_client.close()
+        shutdown_extraction_pool()
+
+def configure_run_caches(args):
+    """Open the persistent caches selected on the command line."""
+    cache_dir = None if args.no_cache else (args.cache_dir or os.path.join(args.output, ".cache"))
+    configure_caches(cache_dir, search_ttl_seconds=args.search_cache_ttl,
+                     search_max_bytes=int(args.search_cache_max_mb * 1024 * 1024),
+                     page_ttl_seconds=args.page_cache_ttl,
+                     page_max_bytes=int(args.page_cache_max_mb * 1024 * 1024),
+                     summary_max_bytes=int(args.summary_cache_max_mb * 1024 * 1024),
+                     prediction_ttl_seconds=args.prediction_cache_ttl,
+                     prediction_max_bytes=int(args.prediction_cache_max_mb * 1024 * 1024),
+                     refresh_predictions=args.refresh_predictions,
+                     clear_predictions=args.clear_prediction_cache,
+                     negative_ttl_seconds=args.negative_cache_ttl)
+    
+    # The local article index lives with the caches, so later runs can answer searches from it too
+    index_path = os.path.join(cache_dir, "article_index.sqlite") if cache_dir and not args.no_local_index else None
+    configure_local_index(index_path, args.local_index_max_age)
+
+def build_bracket_jobs(args, model):
+    """
+    List the brackets to predict in this run.
+    
+    Parameters:
+    - args: Parsed command line arguments (defaults for every bracket)
+    - model: Default Claude model
+    
+    Returns:
+    - List of job dictionaries with the bracket path, a unique name and its settings
+    """
+    if args.batch:
+        with open(args.batch, 'r') as f:
+            entries = json.load(f)
+    elif args.checkpoint:
+        entries = [{"bracket": args.checkpoint}]
+    else:
+        entries = [{"bracket": path} for path in args.bracket]
+    
+    # Comparing models: one bracket per model, all sharing the first model's research
+    if args.models and len(args.models) > 1:
+        model_entries = []
+        for entry in entries:
+            base_name = entry.get("name") or os.path.splitext(os.path.basename(entry["bracket"]))[0]
+            for model_name in args.models:
+                model_entries.append(dict(entry, model=model_name, name=os.path.join(base_name, model_name),
+                                          group=base_name, research_model=entry.get("research_model", args.models[0])))
+        entries = model_entries
+    
+    jobs = []
+    names = set()
+    for entry in entries:
+        job = {
+            "model": model,
+            "simple_analysis": args.simple_analysis,
+            "scheduler": args.scheduler,
+            "max_concurrent_games": args.max_concurrent_games,
+            "game_deadline": args.game_deadline,
+            "speculation_budget": args.speculation_budget,
+            "research_model": None
+        }
+        job.update(entry)
+        if isinstance(job["game_deadline"], str):
+            job["game_deadline"] = parse_duration(job["game_deadline"])
+        
+        # Each bracket gets its own output folder, named after the bracket file by default
+        base_name = entry.get("name") or os.path.splitext(os.path.basename(job["bracket"]))[0]
+        name = base_name
+        suffix = 2
+        while name in names:
+            name = f"{base_name}_{suffix}"
+            suffix += 1
+        names.add(name)
+        job["name"] = name
+        jobs.append(job)
+    
+    return jobs
+
+async def run_bracket_job(job, job_dir, args, anthropic_client, http_session, logger, shared_research=False):
+    """
+    Predict one bracket and generate its reports.
+    
+    Parameters:
+    - job: Job dictionary from build_bracket_jobs
+    - job_dir: Directory for this bracket's checkpoints and reports
+    - args: Parsed command line arguments
+    - anthropic_client: Shared AsyncAnthropic client
+    - http_session: Shared aiohttp session
+    - logger: Main logger
+    - shared_research: True when other brackets run concurrently and share team research
+    
+    Returns:
+    - Path to the completed bracket file
+    """
+    os.makedirs(job_dir, exist_ok=True)
+    bracket_path = job["bracket"]
+    
+    # Copy the input bracket to the run directory for reference
+    try:
+        with open(bracket_path, 'r') as src:
+            input_bracket = json.load(src)
+            input_bracket_path = os.path.join(job_dir, "input_bracket.json")
+            with open(input_bracket_path, 'w') as dest:
+                json.dump(input_bracket, dest, indent=2)
+        logger.debug(f"Copied input bracket to {input_bracket_path}")
+    except Exception as e:
+        logger.warning(f"Could not copy input bracket: {str(e)}")
+    
+    logger.info(f"Processing bracket from: {bracket_path}")
+    
+    final_path = await process_bracket(
+        bracket_path, 
+        job_dir,  # Use run-specific directory
+        anthropic_client, 
+        job["model"],
+        test_mode=args.test,
+        dry_run=args.dry_run,
+        debug_level=args.debug,
+        use_enhanced_analysis=not job["simple_analysis"],
+        max_concurrent_games=job["max_concurrent_games"],
+        scheduler=job["scheduler"],
+        http_session=http_session,
+        game_deadline=job["game_deadline"],
+        prefetch_concurrency=args.prefetch_concurrency,
+        speculation_budget=job["speculation_budget"],
+        queue_path=args.queue,
+        shared_research=shared_research,
+        research_model=job["research_model"]
+    )
+    
+    logger.info(f"Bracket processing complete")
+    print(f"\nBracket prediction complete! Final bracket saved to: {final_path}")
+    
+    # Generate reports
+    logger.info("Generating reports")
+    report_path = generate_report(final_path, job_dir)
+    html_path = generate_html_bracket(final_path, job_dir)
+    
+    # Print final paths
+    print(f"Report generated at: {report_path}")
+    print(f"HTML visualization at: {html_path}")
+    return final_path
+
+async def run_worker_mode(args, anthropic_client, model, use_enhanced_analysis, logger):
+    """Predict games from a coordinator's game queue until the bracket is complete."""
+    configure_rate_limits(args.claude_rpm, args.claude_itpm, args.exa_rps)
+    configure_executor()
+    configure_run_caches(args)
+    http_session = create_http_session()
+    configure_extraction_pool(args.extraction_workers if not args.dry_run else 0)
+    
+    try:
+        completed = await run_worker(
+            args.queue,
+            anthropic_client,
+            model,
+            dry_run=args.dry_run,
+            use_enhanced_analysis=use_enhanced_analysis,
+            max_concurrent_games=args.max_concurrent_games,
+            http_session=http_session,
+            game_deadline=args.game_deadline,
+            lease_seconds=args.lease_seconds,
+            worker_id=args.worker_id
+        )
+        print(f"\nWorker finished: {completed} games predicted")
+    except Exception as e:
+        logger.error(f"Error in worker: {str(e)}", exc_info=True)
+        print(f"Error: {str(e)}. See log file for details.")
+    finally:
+        log_rate_limit_stats()
+        log_executor_stats()
+        log_coalescing_stats()
+        log_source_stats()
+        log_dedup_stats()
+        log_local_index_stats()
+        log_cache_stats()
+        
+        await http_session.close()
+        await anthropic_client.close()
+        shutdown_extraction_pool()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
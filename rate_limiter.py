@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Module
+------------------
+Client-side admission control for the Claude and Exa APIs.
+
+Each provider gets a RateGovernor that combines token-bucket limits (requests and
+input tokens per period) with an adaptive (AIMD) concurrency limit. Throttled
+responses (HTTP 429) pause the provider for the server's Retry-After interval and
+halve the concurrency limit; successful responses slowly raise it again. Retrying
+throttled requests is left to the request executor.
+"""
+
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+
+# Set up logger
+logger = logging.getLogger('rate_limiter')
+
+# Default provider limits (override with configure_rate_limits)
+DEFAULT_CLAUDE_REQUESTS_PER_MINUTE = 50
+DEFAULT_CLAUDE_INPUT_TOKENS_PER_MINUTE = 40000
+DEFAULT_EXA_REQUESTS_PER_SECOND = 5
+
+# Wait used when a 429 response carries no Retry-After header
+DEFAULT_THROTTLE_WAIT_SECONDS = 2.0
+
+# Global registry of run-scoped governors by provider name
+_governors = {}
+
+class ThrottledError(Exception):
+    """Raised when a provider rejects a request because of rate limiting."""
+    
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` units per second with bursts up to `capacity`.
+    """
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+    
+    async def acquire(self, amount=1):
+        """
+        Wait until `amount` units are available and consume them.
+        
+        Requests larger than the bucket capacity are clamped to the capacity so that
+        they can still be admitted once the bucket is full.
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+    
+    def drain(self):
+        """Empty the bucket, e.g. after the provider reported that the limit was hit."""
+        self._refill()
+        self.tokens = 0
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit adjusted with additive-increase / multiplicative-decrease (AIMD).
+    
+    The limit grows by roughly one slot per `limit` successful requests and is halved
+    when the provider throttles. If a target latency is set, requests slower than the
+    target shrink the limit gently, since rising latency is an early sign of overload.
+    """
+    
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=32, target_latency=None):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+    
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+    
+    async def release(self, throttled=False, latency=None):
+        async with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.min_limit, self.limit / 2)
+            elif self.target_latency and latency is not None and latency > self.target_latency:
+                self.limit = max(self.min_limit, self.limit * 0.9)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+class RateGovernor:
+    """
+    Admission control for one provider: request and token buckets plus adaptive concurrency.
+    
+    Parameters:
+    - name: Provider name used in logs
+    - requests_per_second: Sustained request rate
+    - tokens_per_second: Sustained input-token rate (None to disable)
+    - burst_seconds: Bucket capacity in seconds of sustained rate (the provider's limit window)
+    - initial_concurrency, max_concurrency: Bounds for the adaptive concurrency limit
+    - target_latency: Latency in seconds above which concurrency is reduced (None to disable)
+    """
+    
+    def __init__(self, name, requests_per_second, tokens_per_second=None, burst_seconds=1,
+                 initial_concurrency=4, max_concurrency=32, target_latency=None):
+        self.name = name
+        self.request_bucket = TokenBucket(requests_per_second, max(1, requests_per_second * burst_seconds))
+        self.token_bucket = TokenBucket(tokens_per_second, tokens_per_second * burst_seconds) if tokens_per_second else None
+        self.concurrency = AdaptiveConcurrencyLimiter(initial_concurrency, max_limit=max_concurrency,
+                                                      target_latency=target_latency)
+        self.paused_until = 0.0
+        self.stats = {"requests": 0, "throttled": 0}
+    
+    async def _wait_for_cooldown(self):
+        while True:
+            delay = self.paused_until - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+    
+    def on_throttle(self, retry_after=None):
+        """Pause the provider for the Retry-After interval and drain the buckets."""
+        wait = retry_after if retry_after is not None else DEFAULT_THROTTLE_WAIT_SECONDS
+        self.paused_until = max(self.paused_until, time.monotonic() + wait)
+        self.request_bucket.drain()
+        if self.token_bucket:
+            self.token_bucket.drain()
+        self.stats["throttled"] += 1
+        logger.warning(f"{self.name} throttled; pausing {wait:.1f}s (concurrency limit {self.concurrency.limit:.1f})")
+    
+    @asynccontextmanager
+    async def admit(self, tokens=0):
+        """
+        Wait until a request may be sent, then hold a concurrency slot for its duration.
+        
+        Parameters:
+        - tokens: Estimated input tokens for the request
+        """
+        await self._wait_for_cooldown()
+        await self.concurrency.acquire()
+        throttled = False
+        start = None
+        try:
+            await self.request_bucket.acquire()
+            if self.token_bucket and tokens:
+                await self.token_bucket.acquire(tokens)
+            # The buckets may have waited past a new cool-down set by another request
+            await self._wait_for_cooldown()
+            start = time.monotonic()
+            self.stats["requests"] += 1
+            yield
+        except Exception as e:
+            throttled, retry_after = get_throttle_info(e)
+            if throttled:
+                self.on_throttle(retry_after)
+            raise
+        finally:
+            latency = time.monotonic() - start if start is not None else None
+            await self.concurrency.release(throttled=throttled, latency=latency)
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header value (seconds or HTTP date) into seconds.
+    
+    Parameters:
+    - value: Header value or None
+    
+    Returns:
+    - Seconds to wait, or None if the value is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def get_throttle_info(error):
+    """
+    Determine whether an exception represents provider throttling.
+    
+    Understands ThrottledError and API errors exposing a status_code and response
+    headers (such as anthropic.RateLimitError).
+    
+    Returns:
+    - Tuple of (is_throttled, retry_after_seconds)
+    """
+    if isinstance(error, ThrottledError):
+        return True, error.retry_after
+    
+    if getattr(error, "status_code", None) == 429:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        return True, parse_retry_after(headers.get("retry-after"))
+    
+    return False, None
+
+def configure_rate_limits(claude_requests_per_minute=DEFAULT_CLAUDE_REQUESTS_PER_MINUTE,
+                          claude_input_tokens_per_minute=DEFAULT_CLAUDE_INPUT_TOKENS_PER_MINUTE,
+                          exa_requests_per_second=DEFAULT_EXA_REQUESTS_PER_SECOND):
+    """
+    Create the run-scoped governors for Claude and Exa.
+    
+    Parameters:
+    - claude_requests_per_minute: Claude request limit
+    - claude_input_tokens_per_minute: Claude input-token limit
+    - exa_requests_per_second: Exa search request limit
+    """
+    _governors["anthropic"] = RateGovernor(
+        "Claude",
+        requests_per_second=claude_requests_per_minute / 60,
+        tokens_per_second=claude_input_tokens_per_minute / 60,
+        burst_seconds=60,
+        initial_concurrency=4,
+        max_concurrency=max(4, claude_requests_per_minute // 2),
+        target_latency=60
+    )
+    _governors["exa"] = RateGovernor(
+        "Exa",
+        requests_per_second=exa_requests_per_second,
+        initial_concurrency=max(1, exa_requests_per_second),
+        max_concurrency=max(2, exa_requests_per_second * 4),
+        target_latency=10
+    )
+    logger.info(f"Rate limits: Claude {claude_requests_per_minute} req/min, "
+                f"{claude_input_tokens_per_minute} input tokens/min; Exa {exa_requests_per_second} req/s")
+
+def get_governor(provider):
+    """
+    Get the governor for a provider ("anthropic" or "exa"), creating defaults if needed.
+    """
+    if provider not in _governors:
+        configure_rate_limits()
+    return _governors.get(provider)
+
+def log_rate_limit_stats():
+    """Log request and throttling counts for each provider."""
+    for governor in _governors.values():
+        logger.info(f"{governor.name}: {governor.stats['requests']} requests, {governor.stats['throttled']} throttled, "
+                    f"final concurrency limit {governor.concurrency.limit:.1f}")
@@ -129,6 +129,94 @@ def generate_report(bracket_file_path, output_path):
     print(f"Report generated at: {report_path}")
     return report_path
 
+def generate_disagreement_report(final_paths_by_model, output_path):
+    """
+    Compare the brackets predicted by several models for the same input bracket.
+    
+    Parameters:
+    - final_paths_by_model: Dictionary mapping model name to its final bracket JSON file
+    - output_path: Directory to save the report
+    
+    Returns:
+    - Path to the generated report
+    """
+    # Load each model's bracket and index its games
+    brackets = {}
+    for model, path in final_paths_by_model.items():
+        with open(path, 'r') as f:
+            brackets[model] = json.load(f)
+    models = list(brackets)
+    games_by_model = {
+        model: {game["game_id"]: (round_data["round_name"], game)
+                for round_data in bracket["rounds"] for game in round_data["games"]}
+        for model, bracket in brackets.items()
+    }
+    
+    # Games are only comparable when every model predicted the same matchup
+    agreements = 0
+    disagreements = []
+    diverged = 0
+    game_ids = [game_id for game_id in games_by_model[models[0]]]
+    for game_id in game_ids:
+        entries = [games_by_model[model].get(game_id) for model in models]
+        if not all(entry and entry[1].get("predicted_winner") for entry in entries):
+            continue
+        matchups = set((entry[1]["team1"]["name"], entry[1]["team2"]["name"]) for entry in entries)
+        if len(matchups) > 1:
+            diverged += 1
+            continue
+        
+        picks = {model: entry[1] for model, entry in zip(models, entries)}
+        if len(set(game["predicted_winner"] for game in picks.values())) == 1:
+            agreements += 1
+        else:
+            disagreements.append((game_id, entries[0][0], entries[0][1], picks))
+    
+    compared = agreements + len(disagreements)
+    
+    # Initialize the report
+    first_bracket = brackets[models[0]]
+    report = []
+    report.append(f"# {first_bracket['tournament_name']} Model Comparison")
+    report.append(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    report.append(f"Models: {', '.join(models)}\n")
+    
+    # Champions
+    report.append("## Predicted Champions")
+    for model in models:
+        championship = brackets[model]["rounds"][-1]["games"]
+        if championship and championship[0].get("predicted_winner"):
+            report.append(f"- {model}: {championship[0]['predicted_winner']} (Confidence: {championship[0]['confidence']}%)")
+        else:
+            report.append(f"- {model}: TBD")
+    report.append("")
+    
+    # Agreement summary
+    report.append("## Agreement")
+    if compared:
+        report.append(f"- Same winner in {agreements} of {compared} comparable games ({agreements / compared:.0%})")
+    report.append(f"- Games where the models picked different winners: {len(disagreements)}")
+    report.append(f"- Games not comparable because earlier picks produced different matchups: {diverged}")
+    report.append("")
+    
+    # Disagreements, game by game
+    if disagreements:
+        report.append("## Disagreements")
+        for game_id, round_name, game, picks in disagreements:
+            report.append(f"### {game_id} ({round_name}): {game['team1']['name']} (#{game['team1']['seed']}) vs "
+                          f"{game['team2']['name']} (#{game['team2']['seed']})")
+            for model, pick in picks.items():
+                report.append(f"- {model}: {pick['predicted_winner']} ({pick['confidence']}%) - {pick['reasoning']}")
+            report.append("")
+    
+    # Write the report to a file
+    os.makedirs(output_path, exist_ok=True)
+    report_path = os.path.join(output_path, "model_disagreement_report.md")
+    with open(report_path, 'w') as f:
+        f.write("\n".join(report))
+    
+    return report_path
+
 def generate_html_bracket(bracket_file_path, output_path):
     """
     Generate an HTML visualization of the bracket.
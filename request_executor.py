@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Request Executor Module
+----------------------
+Single resilient path for every outbound call (Claude, Exa and page fetches).
+
+The executor classifies failures as retryable or fatal, retries with full-jitter
+exponential backoff, draws retries from a per-run retry budget so that a degraded
+dependency can't trigger a retry storm, and keeps a circuit breaker per endpoint
+that fails fast while that endpoint is down.
+"""
+
+import time
+import random
+import asyncio
+import logging
+import aiohttp
+import anthropic
+from rate_limiter import get_throttle_info
+
+# Set up logger
+logger = logging.getLogger('request_executor')
+
+# Retry defaults
+DEFAULT_MAX_ATTEMPTS = 3
+MAX_THROTTLE_RETRIES = 5  # Throttled attempts are retried separately from max_attempts
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+# Retry budget: a reserve of retries, refilled by a fraction of a retry for every request sent
+RETRY_BUDGET_RESERVE = 20
+RETRY_BUDGET_RATIO = 0.2
+
+# Circuit breaker: consecutive failures before opening, and how long it stays open
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30.0
+CIRCUIT_POLL_SECONDS = 1.0  # How often a call waiting for an open circuit checks for its trial slot
+
+# HTTP statuses worth retrying (timeouts, overload and server errors)
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504, 529}
+
+# Global run-scoped executor
+_executor = None
+
+class HTTPStatusError(Exception):
+    """Raised when an HTTP endpoint responds with an unexpected status code."""
+    
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+class CircuitOpenError(Exception):
+    """Raised without sending a request while an endpoint's circuit breaker is open."""
+
+class RetryBudget:
+    """
+    Per-run retry budget.
+    
+    The budget starts full at `reserve` retries, every retry spends one, and every
+    request sent refills `ratio` of a retry (up to the reserve). When many requests fail
+    at once the budget runs dry and failures surface immediately instead of multiplying
+    load on the failing dependency.
+    """
+    
+    def __init__(self, reserve=RETRY_BUDGET_RESERVE, ratio=RETRY_BUDGET_RATIO):
+        self.balance = float(reserve)
+        self.reserve = reserve
+        self.ratio = ratio
+    
+    def record_request(self):
+        self.balance = min(self.reserve, self.balance + self.ratio)
+    
+    def try_spend(self):
+        if self.balance >= 1:
+            self.balance -= 1
+            return True
+        return False
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one endpoint (closed -> open -> half-open -> closed).
+    
+    Opens after `failure_threshold` consecutive retryable failures. While open, calls
+    fail fast with CircuitOpenError; after `reset_seconds` a single trial call is let
+    through, and its outcome closes or re-opens the circuit.
+    """
+    
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+    
+    def before_call(self):
+        if self.opened_at is None:
+            return
+        if time.monotonic() - self.opened_at < self.reset_seconds or self.trial_in_flight:
+            raise CircuitOpenError(f"Circuit open for {self.name}; failing fast")
+        # Half-open: allow one trial call through
+        self.trial_in_flight = True
+    
+    def seconds_until_trial(self):
+        """Seconds until a call may be let through (0 while the circuit is closed)."""
+        if self.opened_at is None:
+            return 0.0
+        remaining = self.reset_seconds - (time.monotonic() - self.opened_at)
+        return max(remaining, CIRCUIT_POLL_SECONDS)
+    
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info(f"Circuit closed for {self.name}")
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+    
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.trial_in_flight or self.consecutive_failures >= self.failure_threshold:
+            if self.opened_at is None or self.trial_in_flight:
+                logger.warning(f"Circuit opened for {self.name} after {self.consecutive_failures} consecutive failures")
+            self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+    
+    def record_neutral(self):
+        """A call finished with a non-retryable error: the endpoint is up, so end any trial."""
+        if self.trial_in_flight:
+            self.record_success()
+
+def classify_error(error):
+    """
+    Decide whether a failed call is worth retrying.
+    
+    Parameters:
+    - error: Exception raised by the call
+    
+    Returns:
+    - Tuple of (retryable, throttled, retry_after_seconds)
+    """
+    throttled, retry_after = get_throttle_info(error)
+    if throttled:
+        return True, True, retry_after
+    
+    if isinstance(error, CircuitOpenError):
+        return False, False, None
+    
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES, False, None
+    
+    if isinstance(error, (anthropic.APIConnectionError, aiohttp.ClientConnectionError,
+                          aiohttp.ClientPayloadError, asyncio.TimeoutError, ConnectionError)):
+        return True, False, None
+    
+    return False, False, None
+
+def backoff_delay(attempt, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_MAX_SECONDS):
+    """
+    Full-jitter exponential backoff: a random delay in [0, min(cap, base * 2^attempt)].
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class RequestExecutor:
+    """
+    Executes outbound calls with retries, a shared retry budget and per-endpoint breakers.
+    """
+    
+    def __init__(self, retry_budget=None):
+        self.retry_budget = retry_budget or RetryBudget()
+        self.breakers = {}
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "budget_exhausted": 0, "fast_failures": 0,
+                      "circuit_waits": 0}
+    
+    def get_breaker(self, endpoint):
+        if endpoint not in self.breakers:
+            self.breakers[endpoint] = CircuitBreaker(endpoint)
+        return self.breakers[endpoint]
+    
+    async def execute(self, endpoint, request_fn, governor=None, tokens=0, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                      wait_for_circuit=False):
+        """
+        Run a request with retries.
+        
+        Parameters:
+        - endpoint: Circuit breaker key (e.g. "anthropic", "exa", or a site's host name)
+        - request_fn: Zero-argument coroutine function that sends the request
+        - governor: Optional RateGovernor providing admission control for the provider
+        - tokens: Estimated input tokens for the request (for the governor)
+        - max_attempts: Maximum number of attempts, including the first (throttled attempts
+          are retried up to MAX_THROTTLE_RETRIES extra times)
+        - wait_for_circuit: If True, wait while the endpoint's circuit is open instead of
+          failing fast (for calls whose failure can't be made up later)
+        
+        Returns:
+        - Result of request_fn (the last error is raised if every attempt fails)
+        """
+        breaker = self.get_breaker(endpoint)
+        attempt = 0
+        throttle_retries = 0
+        while True:
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                if wait_for_circuit:
+                    self.stats["circuit_waits"] += 1
+                    await asyncio.sleep(breaker.seconds_until_trial())
+                    continue
+                self.stats["fast_failures"] += 1
+                raise
+            
+            self.stats["requests"] += 1
+            self.retry_budget.record_request()
+            try:
+                if governor is not None:
+                    async with governor.admit(tokens):
+                        result = await request_fn()
+                else:
+                    result = await request_fn()
+                breaker.record_success()
+                return result
+            except asyncio.CancelledError:
+                # The caller gave up (deadline, losing speculative branch): the endpoint's health is
+                # unknown, so release a half-open trial for the next call instead of holding it forever
+                breaker.trial_in_flight = False
+                raise
+            except Exception as e:
+                retryable, throttled, retry_after = classify_error(e)
+                
+                # Throttling means the endpoint is up but busy; don't count it against the breaker
+                if retryable and not throttled:
+                    breaker.record_failure()
+                else:
+                    breaker.record_neutral()
+                
+                if throttled and throttle_retries < MAX_THROTTLE_RETRIES:
+                    throttle_retries += 1
+                else:
+                    attempt += 1
+                if not retryable or attempt >= max_attempts:
+                    self.stats["failures"] += 1
+                    raise
+                if not self.retry_budget.try_spend():
+                    self.stats["budget_exhausted"] += 1
+                    self.stats["failures"] += 1
+                    logger.warning(f"Retry budget exhausted; not retrying {endpoint} request: {str(e)}")
+                    raise
+                
+                delay = backoff_delay(attempt + throttle_retries)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                self.stats["retries"] += 1
+                logger.warning(f"{endpoint} request failed (attempt {attempt + throttle_retries}): {str(e)}. "
+                               f"Retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+def configure_executor(retry_budget_reserve=RETRY_BUDGET_RESERVE, retry_budget_ratio=RETRY_BUDGET_RATIO):
+    """
+    Create the run-scoped request executor.
+    
+    Parameters:
+    - retry_budget_reserve: Retries available before any requests have been made
+    - retry_budget_ratio: Retries earned per request sent
+    """
+    global _executor
+    _executor = RequestExecutor(RetryBudget(retry_budget_reserve, retry_budget_ratio))
+    return _executor
+
+def get_executor():
+    """Get the run-scoped request executor, creating a default one if needed."""
+    if _executor is None:
+        configure_executor()
+    return _executor
+
+def log_executor_stats():
+    """Log retry and circuit breaker counts for the run."""
+    if _executor is None:
+        return
+    stats = _executor.stats
+    open_circuits = [name for name, breaker in _executor.breakers.items() if breaker.opened_at is not None]
+    logger.info(f"Requests: {stats['requests']} sent, {stats['retries']} retries, {stats['failures']} failed, "
+                f"{stats['fast_failures']} failed fast, {stats['circuit_waits']} waits for an open circuit, "
+                f"retry budget exhausted {stats['budget_exhausted']} times")
+    if open_circuits:
+        logger.info(f"Circuits still open: {', '.join(open_circuits)}")
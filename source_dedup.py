@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Source Dedup Module
+------------------
+Detects near-duplicate sources before they are summarized.
+
+Syndicated wire stories and rehosted previews show up under different URLs with nearly
+the same text. Each fetched page gets a MinHash signature over word shingles, which
+estimates how much text two pages share; pages sharing most of their text are treated
+as copies, and only the first copy is sent to Claude.
+"""
+
+import re
+import asyncio
+import hashlib
+import logging
+from functools import lru_cache
+from utils import estimate_token_count
+
+# Set up logger
+logger = logging.getLogger('source_dedup')
+
+# Words per shingle, and the number of hash values in a signature
+SHINGLE_WORDS = 3
+SIGNATURE_SIZE = 64
+
+# Pages whose estimated shingle overlap (Jaccard similarity) reaches this are near-duplicates
+NEAR_DUPLICATE_SIMILARITY = 0.7
+
+# One hash function per signature slot, derived from a single 64-bit hash by XOR with a fixed mask
+_SIGNATURE_MASKS = [int.from_bytes(hashlib.blake2b(str(i).encode("utf-8"), digest_size=8).digest(), "big")
+                    for i in range(SIGNATURE_SIZE)]
+
+# Run counters for the end-of-run log: duplicates dropped, tokens of the copies that would have been
+# sent, and tokens of the sources fetched to replace them
+_dedup_stats = {"duplicates": 0, "tokens_dropped": 0, "tokens_replaced": 0}
+
+@lru_cache(maxsize=4096)
+def text_signature(text):
+    """
+    Compute the MinHash signature of a text.
+    
+    Parameters:
+    - text: Extracted page text
+    
+    Returns:
+    - Tuple of SIGNATURE_SIZE hash values
+    """
+    words = re.findall(r"\w+", text.lower())
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+              for shingle in shingles]
+    return tuple(min(h ^ mask for h in hashes) for mask in _SIGNATURE_MASKS)
+
+def estimate_similarity(a, b):
+    """Estimate the share of shingles two texts have in common from their signatures."""
+    return sum(x == y for x, y in zip(a, b)) / SIGNATURE_SIZE
+
+class DuplicateFilter:
+    """
+    Remembers the sources kept so far (e.g. for one game) and spots near-duplicates of them.
+    
+    With `owners` (e.g. a game's query types, in order), each owner registers its sources
+    only after the owners before it have finished, so when several owners find the same
+    article the same one keeps it in every run, whichever fetched it first.
+    
+    Parameters:
+    - owners: Names of the owners sharing the filter, in the order they register sources
+    """
+    
+    def __init__(self, owners=()):
+        self.kept = []  # (signature, url)
+        self.owners = list(owners)
+        self.finished = {owner: asyncio.Event() for owner in self.owners}
+    
+    async def wait_turn(self, owner):
+        """Wait until every owner before `owner` has finished registering its sources."""
+        if owner not in self.finished:
+            return
+        for earlier in self.owners[:self.owners.index(owner)]:
+            await self.finished[earlier].wait()
+    
+    def finish(self, owner):
+        """Let the next owner register its sources (safe to call more than once)."""
+        if owner in self.finished:
+            self.finished[owner].set()
+    
+    def add(self, url, text):
+        """Register a source kept earlier (e.g. read back from the stage journal) without checking it."""
+        self.kept.append((text_signature(text), url))
+    
+    def check(self, url, text, replacing=False):
+        """
+        Keep a source unless it nearly duplicates one already kept.
+        
+        Parameters:
+        - url: Source URL
+        - text: Extracted text of the source
+        - replacing: True if the source was fetched to replace a duplicate dropped earlier
+          (its text would not have been sent anyway, so dropping it saves no tokens)
+        
+        Returns:
+        - URL of the source it duplicates, or None if it was kept
+        """
+        signature = text_signature(text)
+        for kept_signature, kept_url in self.kept:
+            if estimate_similarity(signature, kept_signature) >= NEAR_DUPLICATE_SIMILARITY:
+                _dedup_stats["duplicates"] += 1
+                if not replacing:
+                    _dedup_stats["tokens_dropped"] += estimate_token_count(len(text))
+                logger.debug(f"Dropping {url}: near-duplicate of {kept_url}")
+                return kept_url
+        self.kept.append((signature, url))
+        return None
+
+def record_replacement(text):
+    """Count a source kept in place of a dropped duplicate (its text is sent instead)."""
+    _dedup_stats["tokens_replaced"] += estimate_token_count(len(text))
+
+def log_dedup_stats():
+    """Log how many near-duplicate sources were dropped and the input tokens that saved."""
+    if _dedup_stats["duplicates"]:
+        # A dropped copy replaced by another source saves only the difference in length
+        saved = _dedup_stats["tokens_dropped"] - _dedup_stats["tokens_replaced"]
+        logger.info(f"Dropped {_dedup_stats['duplicates']} near-duplicate sources; about {saved} fewer input "
+                    f"tokens sent to Claude ({_dedup_stats['tokens_dropped']} tokens of repeated text dropped, "
+                    f"{_dedup_stats['tokens_replaced']} tokens of replacement sources added)")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Source Ranking Module
+--------------------
+Ranks search results by how useful their sites have been, and remembers failing sources.
+
+Every page download updates per-domain stats (success rate, latency and the amount of
+text extracted), which are kept across runs in the "domains" cache. URLs that failed
+(bot blocks, paywalls, missing or empty pages) go into a negative cache, and a domain
+whose pages keep failing that way is skipped for a while (timeouts and server errors
+only lower its score). Callers fetch the best-ranked results
+and fall back to the next one when a fetch fails.
+"""
+
+import time
+import asyncio
+import logging
+from urllib.parse import urlparse
+from cache import get_cache
+
+# Set up logger
+logger = logging.getLogger('source_ranking')
+
+# Useful sources wanted per query type
+SOURCES_PER_QUERY = 3
+
+# HTTP statuses that won't change on a retry soon (blocked, paywalled or missing pages)
+PERMANENT_FAILURE_STATUSES = {401, 402, 403, 404, 410, 451}
+
+# Consecutive failed fetches before a domain is skipped, and for how long
+DOMAIN_BLOCK_FAILURES = 3
+DOMAIN_BLOCK_SECONDS = 6 * 60 * 60
+
+# Extracted text length at which a page counts as fully useful for ranking
+USEFUL_TEXT_CHARS = 2000
+
+# Average fetch latency that halves a domain's score
+LATENCY_SCALE_SECONDS = 10.0
+
+# Run-scoped view of the domain stats (loaded from and written back to the "domains" cache)
+_domain_stats = {}
+
+# Run-scoped view of the negative cache: URL -> True if it failed to yield text
+_failed_urls = {}
+
+# Serializes writes of the views back to the caches
+_write_lock = asyncio.Lock()
+
+# Run counters for the end-of-run log
+_ranking_stats = {"skipped": 0, "fallbacks": 0, "failures": 0}
+
+def get_domain(url):
+    """
+    Get the site a URL belongs to (host name without a leading "www.").
+    """
+    domain = urlparse(url).netloc.lower()
+    return domain[4:] if domain.startswith("www.") else domain
+
+def _new_domain_stats():
+    return {"attempts": 0, "successes": 0, "consecutive_failures": 0, "latency_total": 0.0, "chars_total": 0,
+            "blocked_until": 0}
+
+def _read_cached(domains, urls):
+    """Read stored domain stats and negative cache entries (runs in a worker thread)."""
+    domain_cache = get_cache("domains")
+    url_cache = get_cache("failed_urls")
+    stored_stats = {domain: domain_cache.get(domain) for domain in domains} if domain_cache is not None else {}
+    failed = {url: url_cache.get(url) is not None for url in urls} if url_cache is not None else {}
+    return stored_stats, failed
+
+async def _load(domains=(), urls=()):
+    """
+    Make sure the run-scoped views hold the given domains and URLs.
+    
+    The views are only read and updated on the event loop; just the cache reads run in a thread.
+    """
+    domains = [domain for domain in dict.fromkeys(domains) if domain not in _domain_stats]
+    urls = [url for url in dict.fromkeys(urls) if url not in _failed_urls]
+    if not domains and not urls:
+        return
+    stored_stats, failed = await asyncio.to_thread(_read_cached, domains, urls)
+    # Another task may have loaded the same keys while the cache was being read; keep its copy
+    for domain in domains:
+        _domain_stats.setdefault(domain, stored_stats.get(domain) or _new_domain_stats())
+    for url in urls:
+        _failed_urls.setdefault(url, failed.get(url, False))
+
+def domain_score(stats):
+    """
+    Score a domain between 0 and 1 from its fetch history.
+    
+    Unknown domains start at a neutral score; each fetch moves the score towards the
+    domain's success rate, weighted by how much text its pages yield and how fast they load.
+    
+    Parameters:
+    - stats: Domain stats dictionary
+    
+    Returns:
+    - Score (higher is better)
+    """
+    success_rate = (stats["successes"] + 1) / (stats["attempts"] + 2)
+    if stats["successes"]:
+        quality = min(1.0, stats["chars_total"] / stats["successes"] / USEFUL_TEXT_CHARS)
+        latency = stats["latency_total"] / stats["successes"]
+    else:
+        quality = 0.5
+        latency = 0.0
+    return success_rate * (0.5 + 0.5 * quality) / (1 + latency / LATENCY_SCALE_SECONDS)
+
+def _rank(results):
+    now = time.time()
+    candidates = []
+    for index, result in enumerate(results):
+        url = result.get("url")
+        if not url:
+            continue
+        stats = _domain_stats[get_domain(url)]
+        if stats["blocked_until"] > now or _failed_urls[url]:
+            _ranking_stats["skipped"] += 1
+            continue
+        # Scores are bucketed so that results from similar sites keep their recency order
+        candidates.append((-round(domain_score(stats), 1), index, result))
+    candidates.sort(key=lambda candidate: candidate[:2])
+    return [result for _, _, result in candidates]
+
+async def rank_sources(results):
+    """
+    Order search results by their domains' track record, dropping known failures.
+    
+    Parameters:
+    - results: Search results, newest first
+    
+    Returns:
+    - Results worth fetching, best first (results from failing URLs or blocked domains
+      are left out)
+    """
+    urls = [result["url"] for result in results if result.get("url")]
+    await _load(domains=[get_domain(url) for url in urls], urls=urls)
+    return _rank(results)
+
+def _write_cached(domain, stats, failed_url):
+    """Store a domain's stats and a newly failed URL (runs in a worker thread)."""
+    cache = get_cache("domains")
+    if cache is not None:
+        cache.set(domain, stats)
+    cache = get_cache("failed_urls")
+    if cache is not None and failed_url is not None:
+        cache.set(failed_url, True)
+
+async def record_fetch(url, success, latency=0.0, chars=0, permanent=False):
+    """
+    Update a domain's stats after downloading one of its pages.
+    
+    Parameters:
+    - url: URL that was fetched
+    - success: True if the page yielded text
+    - latency: Seconds the download took (successful fetches)
+    - chars: Characters of text extracted (successful fetches)
+    - permanent: True if the URL itself is unusable (blocked, missing or empty), so it
+      isn't fetched again until its negative cache entry expires. Only these failures count
+      towards skipping the whole domain
+    """
+    domain = get_domain(url)
+    await _load(domains=[domain])
+    stats = _domain_stats[domain]
+    stats["attempts"] += 1
+    if success:
+        stats["successes"] += 1
+        stats["consecutive_failures"] = 0
+        stats["latency_total"] += latency
+        stats["chars_total"] += chars
+    else:
+        _ranking_stats["failures"] += 1
+    # Only failures that will recur (blocked, missing or empty pages) can get a domain skipped;
+    # a timeout or server error says little about the site and must not hide it for hours
+    if permanent:
+        stats["consecutive_failures"] += 1
+        if stats["consecutive_failures"] >= DOMAIN_BLOCK_FAILURES:
+            stats["blocked_until"] = time.time() + DOMAIN_BLOCK_SECONDS
+            logger.info(f"Skipping {domain} for {DOMAIN_BLOCK_SECONDS // 3600}h after "
+                        f"{stats['consecutive_failures']} failed fetches")
+        _failed_urls[url] = True
+    
+    # The dicts were updated above on the event loop; only the cache writes run in a thread. Writes go
+    # one at a time with the stats copied just before, so the last one stored is the newest
+    async with _write_lock:
+        await asyncio.to_thread(_write_cached, domain, dict(stats), url if permanent else None)
+
+def record_fallback():
+    """Count a failed source that was replaced by the next-ranked result."""
+    _ranking_stats["fallbacks"] += 1
+
+def log_source_stats():
+    """Log how many sources were skipped, failed and replaced during the run."""
+    if any(_ranking_stats.values()):
+        logger.info(f"Sources: {_ranking_stats['skipped']} known failures skipped, {_ranking_stats['failures']} "
+                    f"fetches failed, {_ranking_stats['fallbacks']} replaced by the next-ranked result")
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Local Index Tests
+-----------------
+Check that local matches respect the terms that tell one query from another.
+"""
+
+from local_index import ArticleIndex
+
+SEED_QUERY = "#{} seed vs #{} seed historical NCAA tournament matchup statistics"
+
+def seed_article(high, low):
+    return (f"#{high} seed vs #{low} seed: historical NCAA tournament matchup statistics. "
+            f"In the tournament the No. {high} seed facing the No. {low} seed has a long matchup history, "
+            f"and these statistics cover every meeting.")
+
+def build_index(tmp_path):
+    index = ArticleIndex(str(tmp_path / "index.db"))
+    index.add("https://example.com/1-vs-16", "1 vs 16 seed history", seed_article(1, 16))
+    index.add("https://example.com/8-vs-9", "8 vs 9 seed history", seed_article(8, 9))
+    # Unrelated articles so term weights reflect a realistic index
+    for i in range(5):
+        index.add(f"https://example.com/other-{i}", "Basketball news", "College basketball season preview and rankings.")
+    return index
+
+def test_seed_pairs_do_not_match_each_others_articles(tmp_path):
+    index = build_index(tmp_path)
+    
+    assert [r["url"] for r in index.search(SEED_QUERY.format(1, 16), 5)] == ["https://example.com/1-vs-16"]
+    assert [r["url"] for r in index.search(SEED_QUERY.format(8, 9), 5)] == ["https://example.com/8-vs-9"]
+    assert index.search(SEED_QUERY.format(2, 15), 5) == []
+
+def test_required_team_names_must_match(tmp_path):
+    index = ArticleIndex(str(tmp_path / "index.db"))
+    for team in ("North Carolina", "South Carolina"):
+        index.add(f"https://example.com/{team.split()[0].lower()}", f"{team} preview",
+                  f"{team} basketball team statistics 2025 analysis strengths weaknesses.")
+    query = "North Carolina basketball team statistics 2025 analysis strengths weaknesses"
+    
+    results = index.search(query, 5, required=("North Carolina",))
+    assert [r["url"] for r in results] == ["https://example.com/north"]
@@ -5,8 +5,10 @@ Utility Functions
 Helper functions for the bracket prediction system.
 """
 
-import logging
 import re
+import time
+import asyncio
+import logging
 
 # Set up logger
 logger = logging.getLogger('utils')
@@ -125,6 +127,69 @@ def get_previous_game_id(game_id, bracket):
         logger.error(f"Error getting previous game ID: {str(e)}")
         return None
 
+def parse_game_id(game_id):
+    """
+    Split a game ID into its round and game numbers.
+    
+    Parameters:
+    - game_id: Game identifier (e.g., "R2G3")
+    
+    Returns:
+    - Tuple of (round_number, game_number), or (None, None) if the ID is malformed
+    """
+    match = re.match(r'R(\d+)G(\d+)', game_id or "")
+    if not match:
+        logger.warning(f"Unexpected game_id format: {game_id}")
+        return None, None
+    return int(match.group(1)), int(match.group(2))
+
+def get_feeder_game_ids(game_id):
+    """
+    Get the IDs of the two previous-round games whose winners meet in this game.
+    
+    Parameters:
+    - game_id: Game identifier (e.g., "R2G1" is fed by "R1G1" and "R1G2")
+    
+    Returns:
+    - List of two feeder game IDs, or an empty list for first round games
+    """
+    round_num, game_num = parse_game_id(game_id)
+    if round_num is None or round_num <= 1:
+        return []
+    return [f"R{round_num - 1}G{game_num * 2 - 1}", f"R{round_num - 1}G{game_num * 2}"]
+
+def get_parent_game_id(game_id, num_rounds=6):
+    """
+    Get the ID of the next-round game that the winner of this game advances to.
+    
+    Parameters:
+    - game_id: Game identifier (e.g., "R1G2" feeds "R2G1")
+    - num_rounds: Total number of rounds in the tournament
+    
+    Returns:
+    - Parent game ID, or None for the championship game
+    """
+    round_num, game_num = parse_game_id(game_id)
+    if round_num is None or round_num >= num_rounds:
+        return None
+    return f"R{round_num + 1}G{(game_num + 1) // 2}"
+
+def get_sibling_game_id(game_id):
+    """
+    Get the ID of the game whose winner this game's winner will play next.
+    
+    Parameters:
+    - game_id: Game identifier (e.g., "R1G1" and "R1G2" are siblings)
+    
+    Returns:
+    - Sibling game ID, or None if the ID is malformed
+    """
+    round_num, game_num = parse_game_id(game_id)
+    if round_num is None:
+        return None
+    sibling_num = game_num + 1 if game_num % 2 == 1 else game_num - 1
+    return f"R{round_num}G{sibling_num}"
+
 def estimate_token_count(text_length):
     """
     Rough estimation of token count for context management.
@@ -142,6 +207,88 @@ def estimate_token_count(text_length):
     # Claude uses about 4 characters per token on average
     return text_length // 4  # Approximate 4 chars per token
 
+def estimate_messages_token_count(messages, system_prompt=""):
+    """
+    Rough estimation of the input tokens for a Claude request.
+    
+    Parameters:
+    - messages: List of conversation messages
+    - system_prompt: System prompt sent with the messages
+    
+    Returns:
+    - Estimated token count
+    """
+    text_length = len(system_prompt or "")
+    for message in messages:
+        for content in message.get("content", []):
+            text_length += len(content.get("text", ""))
+    return estimate_token_count(text_length)
+
+def parse_duration(value):
+    """
+    Parse a duration such as "60", "60s", "1.5m" or "2h" into seconds.
+    
+    Parameters:
+    - value: Duration string
+    
+    Returns:
+    - Duration in seconds as a float
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*', str(value).lower())
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+    multiplier = {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+    return float(match.group(1)) * multiplier
+
+def remaining_time(deadline):
+    """
+    Seconds left until a time.monotonic() deadline.
+    
+    Parameters:
+    - deadline: Deadline as a time.monotonic() value, or None for no deadline
+    
+    Returns:
+    - Remaining seconds (never negative), or None if there is no deadline
+    """
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+async def gather_until_deadline(coroutines, deadline):
+    """
+    Run coroutines concurrently and collect the results that finish before a deadline.
+    
+    Coroutines still running at the deadline are cancelled. Coroutines that raised
+    are treated like unfinished ones and logged.
+    
+    Parameters:
+    - coroutines: List of coroutines to run
+    - deadline: Deadline as a time.monotonic() value, or None to wait for all
+    
+    Returns:
+    - List of results in input order, with None for coroutines that did not finish
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    if not tasks:
+        return []
+    
+    done, pending = await asyncio.wait(tasks, timeout=remaining_time(deadline))
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning(f"Deadline reached: cancelled {len(pending)} of {len(tasks)} outstanding tasks")
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    results = []
+    for task in tasks:
+        if task in done and not task.cancelled() and task.exception() is None:
+            results.append(task.result())
+        else:
+            if task in done and not task.cancelled():
+                logger.error(f"Task failed: {str(task.exception())}")
+            results.append(None)
+    return results
+
 def sanitize_team_name(name):
     """
     Sanitize team name for comparison.